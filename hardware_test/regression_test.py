@@ -4,12 +4,18 @@ Automatic Regression Test Module for Hardware Testing
 Provides automated build, flash, test execution, and result comparison.
 """
 
+import atexit
+import copy
+import hashlib
 import json
 import os
+import queue
+import selectors
 import subprocess
+import threading
 import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 
 class RegressionTester:
@@ -35,6 +41,24 @@ class RegressionTester:
         {"name": "integration_test", "description": "Full system integration test", "timeout": 240},
     ]
 
+    # Config keys and their defaults, deep-copied onto the instance in __init__
+    _DEFAULTS: Dict[str, Any] = {
+        "project_root": ".",
+        "build_command": "make",
+        "build_args": [],
+        "flash_command": "make",
+        "flash_args": ["flash"],
+        "test_timeout": 300,
+        "results_dir": "test_results",
+        "harness_command": None,
+        "harness_args": [],
+        "max_history": 100,
+        "test_sequence": DEFAULT_TEST_SEQUENCE,
+    }
+
+    # Line the test harness prints once a test has finished
+    HARNESS_DONE_MARKER = "TEST_DONE"
+
     def __init__(self, config_file: str):
         """
         Initialize the regression tester with a configuration file.
@@ -47,19 +71,17 @@ class RegressionTester:
         self.test_results: Dict[str, Any] = {}
         self.current_results: Dict[str, Any] = {}
 
-        # Extract config parameters
-        self.project_root = self.config.get("project_root", ".")
-        self.build_command = self.config.get("build_command", "make")
-        self.build_args = self.config.get("build_args", [])
-        self.flash_command = self.config.get("flash_command", "make")
-        self.flash_args = self.config.get("flash_args", ["flash"])
-        self.test_timeout = self.config.get("test_timeout", 300)
-        self.results_dir = self.config.get("results_dir", "test_results")
-
-        # Test sequence (use custom or default)
-        self.test_sequence = self.config.get(
-            "test_sequence", self.DEFAULT_TEST_SEQUENCE
-        )
+        # Extract config parameters; defaults are copied so instances never
+        # share the mutable lists (test_sequence holds nested dicts)
+        for key, default in self._DEFAULTS.items():
+            value = self.config[key] if key in self.config else copy.deepcopy(default)
+            setattr(self, key, value)
+
+        # Persistent harness process, started on the first test
+        self._harness: Optional[subprocess.Popen] = None
+        self._harness_buffer = b""
+        # Line queue fed by a reader thread (Windows only, see _read_until_done)
+        self._harness_lines: Optional[queue.Queue] = None
 
         # Create results directory
         os.makedirs(self.results_dir, exist_ok=True)
@@ -74,16 +96,20 @@ class RegressionTester:
         Load baseline test results for comparison.
 
         Args:
-            baseline_path: Path to baseline JSON file
+            baseline_path: Path to a baseline store directory written by
+                save_baseline, or to a plain baseline JSON file
 
         Returns:
             True if loaded successfully, False otherwise
         """
         try:
-            with open(baseline_path, 'r') as f:
-                self.baseline = json.load(f)
+            if os.path.isdir(baseline_path):
+                self.baseline = self._load_baseline_store(baseline_path)
+            else:
+                with open(baseline_path, 'r') as f:
+                    self.baseline = json.load(f)
             return True
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+        except (FileNotFoundError, KeyError, json.JSONDecodeError) as e:
             print(f"Error loading baseline: {e}")
             return False
 
@@ -91,20 +117,70 @@ class RegressionTester:
         """
         Save current test results as baseline.
 
+        The baseline is stored as a directory of content-addressed test
+        records plus a small ``head.json`` index. Records that already
+        exist are not rewritten, so only changed tests cost disk I/O.
+
+        If ``path`` ends in ``.json`` or is an existing file, the baseline
+        is written there as a single JSON file instead, as in older
+        releases, so existing baseline paths keep working with
+        load_baseline.
+
         Args:
-            path: Path to save baseline file
+            path: Path to the baseline store directory, or to a baseline
+                JSON file
 
         Returns:
             True if saved successfully, False otherwise
         """
+        if path.endswith(".json") or os.path.isfile(path):
+            try:
+                self._atomic_write(path, json.dumps(self.baseline, indent=2))
+                return True
+            except IOError as e:
+                print(f"Error saving baseline: {e}")
+                return False
+
+        records_dir = os.path.join(path, "records")
+        head = {key: value for key, value in self.baseline.items()
+                if key != "test_sequence"}
+        head["test_sequence"] = []
+
         try:
-            with open(path, 'w') as f:
-                json.dump(self.baseline, f, indent=2)
+            os.makedirs(records_dir, exist_ok=True)
+
+            for test in self.baseline.get("test_sequence", []):
+                record = json.dumps(test, sort_keys=True, separators=(",", ":"))
+                digest = hashlib.blake2b(
+                    record.encode(), digest_size=16
+                ).hexdigest()
+
+                record_path = os.path.join(records_dir, f"{digest}.json")
+                if not os.path.exists(record_path):
+                    self._atomic_write(record_path, record)
+
+                head["test_sequence"].append(digest)
+
+            self._atomic_write(os.path.join(path, "head.json"),
+                               json.dumps(head, indent=2))
             return True
         except IOError as e:
             print(f"Error saving baseline: {e}")
             return False
 
+    def _load_baseline_store(self, path: str) -> Dict[str, Any]:
+        """Resolve a baseline store's head.json into full test results."""
+        with open(os.path.join(path, "head.json"), 'r') as f:
+            baseline = json.load(f)
+
+        tests = []
+        for digest in baseline["test_sequence"]:
+            with open(os.path.join(path, "records", f"{digest}.json"), 'r') as f:
+                tests.append(json.load(f))
+        baseline["test_sequence"] = tests
+
+        return baseline
+
     def build(self) -> bool:
         """
         Build the firmware/project.
@@ -280,7 +356,17 @@ class RegressionTester:
         """
         Execute the actual test harness for a given test.
 
-        Override this method with actual test implementation.
+        If ``harness_command`` is configured, a single harness process is
+        kept running across tests. Each test is requested with a
+        ``RUN <test_name>`` line on its stdin and its output is consumed
+        until the ``TEST_DONE`` marker arrives, so the call returns as soon
+        as the device reports completion. Without a harness the simulated
+        placeholder result is returned.
+
+        Harness output protocol (one item per line):
+            METRIC <key>=<value>
+            ERROR <message>
+            TEST_DONE PASS|FAIL
 
         Args:
             test_name: Name of the test
@@ -289,22 +375,206 @@ class RegressionTester:
         Returns:
             Tuple of (passed, metrics, errors)
         """
-        # Placeholder: Simulate test execution
-        # Replace with actual test logic
-        time.sleep(0.1)  # Simulate quick test
+        if not self.harness_command:
+            # Placeholder: Simulated test result
+            metrics = {
+                "execution_time_ms": 100,
+                "iterations": 10,
+                "success_rate": 100.0
+            }
+            return True, metrics, []
 
-        # Generate simulated metrics
-        metrics = {
-            "execution_time_ms": 100,
-            "iterations": 10,
-            "success_rate": 100.0
-        }
+        harness = self._get_harness()
+        try:
+            harness.stdin.write(f"RUN {test_name}\n".encode())
+            harness.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            return False, {}, [f"Harness unavailable: {e}"]
+
+        lines, completed = self._read_until_done(harness.stdout, timeout)
+
+        passed, metrics, errors = self._parse_harness_output(lines)
+        if not completed:
+            # Harness state is unknown, restart it for the next test
+            self.close()
+            errors.append(f"Harness did not report completion within {timeout}s")
+            passed = False
+
+        return passed, metrics, errors
+
+    def _get_harness(self) -> subprocess.Popen:
+        """Return the running harness process, starting it if needed."""
+        if self._harness is None or self._harness.poll() is not None:
+            self.close()
+            self._harness = subprocess.Popen(
+                [self.harness_command] + self.harness_args,
+                cwd=self.project_root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0
+            )
+            atexit.register(self.close)
+        return self._harness
+
+    def close(self):
+        """Stop the harness process if it is running."""
+        harness, self._harness = self._harness, None
+        self._harness_buffer = b""
+        self._harness_lines = None
+        if harness is None:
+            return
+
+        atexit.unregister(self.close)
+        if harness.poll() is None:
+            harness.terminate()
+            try:
+                harness.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                harness.kill()
+                harness.wait()
+        harness.stdin.close()
+        harness.stdout.close()
+
+    def _read_until_done(self, stream, timeout: float) -> Tuple[List[str], bool]:
+        """
+        Read harness output lines until the completion marker is seen.
 
-        return True, metrics, []
+        Blocks in ``select`` on the stream instead of sleeping, so it wakes
+        as soon as data is available and stops at a monotonic deadline.
+        Bytes following the marker are kept for the next test. On Windows,
+        where ``select`` only accepts sockets, a reader thread feeds lines
+        into a queue instead.
+
+        Args:
+            stream: Unbuffered binary stream with a file descriptor
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Tuple of (lines read, whether the marker was seen)
+        """
+        deadline = time.monotonic() + timeout
+        if os.name == "nt":
+            return self._read_queued_until_done(stream, deadline)
+
+        lines: List[str] = []
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(stream, selectors.EVENT_READ)
+
+            while True:
+                while b"\n" in self._harness_buffer:
+                    raw, _, self._harness_buffer = self._harness_buffer.partition(b"\n")
+                    line = raw.decode(errors="replace").strip()
+                    lines.append(line)
+                    if line.startswith(self.HARNESS_DONE_MARKER):
+                        return lines, True
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    return lines, False
+
+                chunk = os.read(stream.fileno(), 4096)
+                if not chunk:
+                    # Harness exited without reporting completion
+                    return lines, False
+
+                self._harness_buffer += chunk
+
+    def _read_queued_until_done(self, stream,
+                                deadline: float) -> Tuple[List[str], bool]:
+        """
+        Queue-based variant of _read_until_done for platforms without
+        ``select`` on pipes.
+
+        Args:
+            stream: Unbuffered binary stream with a file descriptor
+            deadline: ``time.monotonic()`` value to stop waiting at
+
+        Returns:
+            Tuple of (lines read, whether the marker was seen)
+        """
+        if self._harness_lines is None:
+            self._harness_lines = queue.Queue()
+            threading.Thread(
+                target=self._pump_lines,
+                args=(stream, self._harness_lines),
+                daemon=True
+            ).start()
+
+        lines: List[str] = []
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return lines, False
+
+            try:
+                raw = self._harness_lines.get(timeout=remaining)
+            except queue.Empty:
+                return lines, False
+
+            if raw is None:
+                # Harness exited without reporting completion; keep the
+                # sentinel so later reads also return immediately
+                self._harness_lines.put(None)
+                return lines, False
+
+            line = raw.decode(errors="replace").strip()
+            lines.append(line)
+            if line.startswith(self.HARNESS_DONE_MARKER):
+                return lines, True
+
+    @staticmethod
+    def _pump_lines(stream, lines: queue.Queue):
+        """Reader thread: push each output line onto the queue, then None at EOF."""
+        buffer = b""
+        while True:
+            try:
+                chunk = os.read(stream.fileno(), 4096)
+            except (OSError, ValueError):
+                chunk = b""
+            if not chunk:
+                break
+
+            *complete, buffer = (buffer + chunk).split(b"\n")
+            for raw in complete:
+                lines.put(raw)
+
+        lines.put(None)
+
+    def _parse_harness_output(self, lines: List[str]) -> Tuple[bool, Dict, List[str]]:
+        """
+        Parse harness output lines into a test result.
+
+        Args:
+            lines: Output lines from the harness
+
+        Returns:
+            Tuple of (passed, metrics, errors)
+        """
+        passed = False
+        metrics: Dict[str, Any] = {}
+        errors: List[str] = []
+
+        for line in lines:
+            if line.startswith("METRIC "):
+                key, _, value = line[len("METRIC "):].partition("=")
+                try:
+                    metrics[key.strip()] = float(value)
+                except ValueError:
+                    metrics[key.strip()] = value.strip()
+            elif line.startswith("ERROR "):
+                errors.append(line[len("ERROR "):])
+            elif line.startswith(self.HARNESS_DONE_MARKER):
+                passed = line[len(self.HARNESS_DONE_MARKER):].strip() == "PASS"
+
+        return passed, metrics, errors
 
     def _save_test_results(self):
         """Save test results to file."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(
             self.results_dir,
             f"test_results_{timestamp}.json"
@@ -315,6 +585,33 @@ class RegressionTester:
 
         print(f"Results saved to {filename}")
 
+        self._prune_old_results()
+
+    def _iter_result_files(self) -> Iterator[os.DirEntry]:
+        """Yield saved test result files in the results directory."""
+        with os.scandir(self.results_dir) as it:
+            for entry in it:
+                if (entry.name.startswith("test_results_")
+                        and entry.name.endswith(".json")
+                        and entry.is_file()):
+                    yield entry
+
+    def _prune_old_results(self):
+        """Remove the oldest result files beyond ``max_history``."""
+        if not self.max_history:
+            return
+
+        entries = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in self._iter_result_files()
+        )
+
+        for _, path in entries[:-self.max_history]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing old result {path}: {e}")
+
     def compare_results(self, current: Dict[str, Any],
                         baseline: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -345,53 +642,63 @@ class RegressionTester:
         current_tests = {t["name"]: t for t in current.get("test_sequence", [])}
         baseline_tests = {t["name"]: t for t in baseline.get("test_sequence", [])}
 
-        all_tests = set(current_tests.keys()) | set(baseline_tests.keys())
+        current_names = current_tests.keys()
+        baseline_names = baseline_tests.keys()
+        summary = comparison["summary"]
+        test_comparisons = []
+
+        # Tests present in both runs: compare key metric (execution time)
+        for test_name in current_names & baseline_names:
+            current_val = current_tests[test_name].get("metrics", {}).get(
+                "execution_time_ms"
+            )
+            baseline_val = baseline_tests[test_name].get("metrics", {}).get(
+                "execution_time_ms"
+            )
 
-        for test_name in all_tests:
             test_comp = {
                 "name": test_name,
                 "status": "stable",
-                "current_value": None,
-                "baseline_value": None,
+                "current_value": current_val,
+                "baseline_value": baseline_val,
                 "change_pct": 0
             }
 
-            if test_name in current_tests and test_name in baseline_tests:
-                # Compare existing tests
-                current_metrics = current_tests[test_name].get("metrics", {})
-                baseline_metrics = baseline_tests[test_name].get("metrics", {})
-
-                # Compare key metric (execution time as example)
-                current_val = current_metrics.get("execution_time_ms")
-                baseline_val = baseline_metrics.get("execution_time_ms")
-
-                test_comp["current_value"] = current_val
-                test_comp["baseline_value"] = baseline_val
-
-                if current_val is not None and baseline_val is not None:
-                    if current_val < baseline_val:
-                        test_comp["status"] = "improved"
-                        comparison["summary"]["improved"] += 1
-                    elif current_val > baseline_val:
-                        test_comp["status"] = "degraded"
-                        comparison["summary"]["degraded"] += 1
-                    else:
-                        comparison["summary"]["stable"] += 1
-
-                    test_comp["change_pct"] = (
-                        ((current_val - baseline_val) / baseline_val * 100)
-                        if baseline_val else 0
-                    )
-
-            elif test_name in current_tests:
-                test_comp["status"] = "new"
-                comparison["summary"]["new_tests"] += 1
-            else:
-                test_comp["status"] = "removed"
-                comparison["summary"]["removed_tests"] += 1
+            if current_val is not None and baseline_val is not None:
+                if current_val < baseline_val:
+                    test_comp["status"] = "improved"
+                    summary["improved"] += 1
+                elif current_val > baseline_val:
+                    test_comp["status"] = "degraded"
+                    summary["degraded"] += 1
+                else:
+                    summary["stable"] += 1
+
+                test_comp["change_pct"] = (
+                    ((current_val - baseline_val) / baseline_val * 100)
+                    if baseline_val else 0
+                )
+
+            test_comparisons.append(test_comp)
+
+        new_tests = current_names - baseline_names
+        removed_tests = baseline_names - current_names
+
+        test_comparisons.extend(
+            {"name": test_name, "status": "new", "current_value": None,
+             "baseline_value": None, "change_pct": 0}
+            for test_name in new_tests
+        )
+        test_comparisons.extend(
+            {"name": test_name, "status": "removed", "current_value": None,
+             "baseline_value": None, "change_pct": 0}
+            for test_name in removed_tests
+        )
 
-            comparison["test_comparisons"].append(test_comp)
-            comparison["summary"]["total_tests"] += 1
+        summary["new_tests"] = len(new_tests)
+        summary["removed_tests"] = len(removed_tests)
+        summary["total_tests"] = len(test_comparisons)
+        comparison["test_comparisons"] = test_comparisons
 
         # Overall status
         if comparison["summary"]["degraded"] > 0:
@@ -405,7 +712,21 @@ class RegressionTester:
 
     def generate_report(self, test_result: Dict[str, Any]) -> str:
         """
-        Generate a human-readable test report.
+        Generate a human-readable test report and save it to disk.
+
+        Args:
+            test_result: Test results dictionary
+
+        Returns:
+            Formatted report string
+        """
+        report_text = self.format_report(test_result)
+        self.save_report(report_text)
+        return report_text
+
+    def format_report(self, test_result: Dict[str, Any]) -> str:
+        """
+        Format a human-readable test report without writing it to disk.
 
         Args:
             test_result: Test results dictionary
@@ -417,7 +738,7 @@ class RegressionTester:
             "=" * 60,
             "REGRESSION TEST REPORT",
             "=" * 60,
-            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}",
             f"Test Timestamp: {test_result.get('timestamp', 'N/A')}",
             "",
             "-" * 60,
@@ -473,17 +794,41 @@ class RegressionTester:
             "=" * 60,
         ])
 
-        report_text = "\n".join(report_lines)
+        return "\n".join(report_lines)
 
-        # Save report to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_path = os.path.join(self.results_dir, f"report_{timestamp}.txt")
-        with open(report_path, 'w') as f:
-            f.write(report_text)
+    def save_report(self, report_text: str,
+                    report_path: Optional[str] = None) -> str:
+        """
+        Save a formatted report to disk.
+
+        The report is written to a temporary file and renamed into place,
+        so readers never see a partially written report.
+
+        Args:
+            report_text: Formatted report string
+            report_path: Destination path (default: timestamped file in
+                results_dir)
+
+        Returns:
+            Path the report was saved to
+        """
+        if report_path is None:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            report_path = os.path.join(self.results_dir, f"report_{timestamp}.txt")
+
+        self._atomic_write(report_path, report_text)
 
         print(f"Report saved to {report_path}")
 
-        return report_text
+        return report_path
+
+    @staticmethod
+    def _atomic_write(path: str, text: str):
+        """Write text to a temporary file and atomically rename it to path."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
 
     def run_full_pipeline(self) -> Dict[str, Any]:
         """
@@ -539,9 +884,10 @@ class RegressionTester:
 
         # Step 4: Generate report
         print("\n[Step 4/4] Generating report...")
-        report = self.generate_report(test_results)
+        report = self.format_report(test_results)
+        report_path = self.save_report(report)
         pipeline_result["steps"]["report"] = {
-            "path": None,  # Will be set by generate_report
+            "path": report_path,
             "timestamp": datetime.now().isoformat()
         }
 
@@ -580,6 +926,9 @@ if __name__ == "__main__":
         "flash_args": ["flash", "DEVICE_ID={device_id}"],
         "test_timeout": 300,
         "results_dir": "test_results",
+        "harness_command": None,
+        "harness_args": [],
+        "max_history": 100,
         "test_sequence": [
             {"name": "power_on_test", "description": "Power-on self test", "timeout": 10},
             {"name": "memory_test", "description": "Memory integrity test", "timeout": 30},
@@ -601,7 +950,7 @@ if __name__ == "__main__":
     tester = RegressionTester("config.json")
 
     # Load baseline (optional)
-    tester.load_baseline("baseline_results.json")
+    tester.load_baseline("baseline_results")
 
     # Run full pipeline
     results = tester.run_full_pipeline()
@@ -611,4 +960,6 @@ if __name__ == "__main__":
     # tester.flash("COM3")
     # results = tester.run_tests()
     # report = tester.generate_report(results)
+    # text = tester.format_report(results)  # string only, no file written
+    # tester.close()  # stop the persistent harness process
     """)
@@ -15,17 +15,34 @@ STM32 芯片配置库
 - STM32G0xx (Cortex-M0+)
 - STM32C0xx (Cortex-M0+)
 
+芯片数据保存在同目录的 stm32_chips.json, 首次查找时加载。
+
 使用:
     from stm32_chip import ChipConfig, get_chip_config
     config = get_chip_config("STM32F407VG")
 """
 
+import functools
 import json
 import os
-from typing import Dict, Optional
+import re
+import sys
+from typing import Dict, List, NamedTuple, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+KB = 1024
+MB = 1024 * KB
+
+# 数据库中容量字符串的单位后缀
+_SIZE_UNITS = {"K": KB, "M": MB}
+
 
 class ChipFamily(Enum):
     """芯片系列"""
@@ -55,7 +72,7 @@ class Cortex(Enum):
     M7 = "Cortex-M7"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FlashConfig:
     """Flash 配置"""
     start: int = 0x08000000
@@ -64,17 +81,25 @@ class FlashConfig:
     sector_count: int = 0
     page_size: int = 0
     base_address: int = 0x08000000
+    start_hex: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "start_hex", hex(self.start))
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RamConfig:
     """RAM 配置"""
     size: int = 0  # KB
     start: int = 0x20000000
     sections: Dict[str, tuple] = field(default_factory=dict)
+    start_hex: str = field(init=False, repr=False, compare=False)
 
+    def __post_init__(self):
+        object.__setattr__(self, "start_hex", hex(self.start))
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ClockConfig:
     """时钟配置"""
     hse: int = 8000000  # Hz
@@ -84,7 +109,7 @@ class ClockConfig:
     apb2: int = 84000000
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Peripherals:
     """外设"""
     has_i2c: bool = True
@@ -99,7 +124,7 @@ class Peripherals:
     has_gpio: int = 0   # GPIO 数量
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ChipConfig:
     """芯片配置"""
     name: str
@@ -128,502 +153,143 @@ class ChipConfig:
     openocd_target: str = "stm32f4x"
     openocd_flash_driver: str = "stm32f2x"
 
+    def __post_init__(self):
+        # 共享重复的字符串和元组 (多个芯片使用相同的 target/封装/电压)
+        for name in ("name", "package", "openocd_target", "openocd_flash_driver"):
+            object.__setattr__(self, name, sys.intern(getattr(self, name)))
+        for name in ("voltage", "temp_range"):
+            value = tuple(getattr(self, name))
+            object.__setattr__(self, name, _SHARED_TUPLES.setdefault(value, value))
 
-# 芯片数据库
-CHIP_DATABASE: Dict[str, ChipConfig] = {}
 
+# 共享元组池 (voltage / temp_range)
+_SHARED_TUPLES: Dict[tuple, tuple] = {}
 
-def _init_chip_database():
-    """初始化芯片数据库"""
-    global CHIP_DATABASE
-    
-    # ============ STM32F4xx 系列 ============
-    
-    # STM32F405/407
-    CHIP_DATABASE["STM32F405RG"] = ChipConfig(
-        name="STM32F405RG",
-        part_number="STM32F405RGT6",
-        family=ChipFamily.STM32F4,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=1024,  # 1MB
-            sector_size=16*1024,  # 16KB
-            sector_count=64,
-            page_size=256*1024  # 256KB 整个扇区
-        ),
-        ram=RamConfig(
-            size=192,  # 192KB SRAM
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 112*1024),
-                "SRAM2": (0x2001C000, 16*1024),
-                "CCM": (0x10000000, 64*1024)  # Core Coupled Memory
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=168000000,
-            ahb=168000000,
-            apb1=42000000,
-            apb2=84000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=3, has_spi=3, has_uart=6,
-            has_can=2, has_usb=True, has_eth=True,
-            has_adc=16, has_pwm=14, has_gpio=82
-        ),
-        package="LQFP64",
-        voltage=(1.8, 3.6),
-        temp_range=(-40, 105)
-    )
-    
-    # STM32F407VG (常用)
-    CHIP_DATABASE["STM32F407VG"] = ChipConfig(
-        name="STM32F407VG",
-        part_number="STM32F407VGT6",
-        family=ChipFamily.STM32F4,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=1024,  # 1MB
-            sector_size=16*1024,
-            sector_count=64,
-            page_size=256*1024
-        ),
-        ram=RamConfig(
-            size=192,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 112*1024),
-                "SRAM2": (0x2001C000, 16*1024),
-                "CCM": (0x10000000, 64*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=168000000,
-            ahb=168000000,
-            apb1=42000000,
-            apb2=84000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=3, has_spi=3, has_uart=6,
-            has_can=2, has_usb=True, has_eth=True,
-            has_adc=16, has_pwm=14, has_gpio=82
-        ),
-        package="LQFP100",
-        openocd_target="stm32f4x",
-        openocd_flash_driver="stm32f4x"
-    )
-    
-    # STM32F401
-    CHIP_DATABASE["STM32F401CC"] = ChipConfig(
-        name="STM32F401CC",
-        part_number="STM32F401CCU6",
-        family=ChipFamily.STM32F4,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=256,  # 256KB
-            sector_size=16*1024,
-            sector_count=16
-        ),
-        ram=RamConfig(
-            size=96,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 64*1024),
-                "SRAM2": (0x20010000, 32*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=84000000,
-            ahb=84000000,
-            apb1=42000000,
-            apb2=84000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=3, has_spi=3, has_uart=6,
-            has_can=0, has_usb=True, has_eth=False,
-            has_adc=10, has_pwm=10, has_gpio=50
-        ),
-        package="UFQFPN48",
-        openocd_target="stm32f4x"
-    )
-    
-    # STM32F411
-    CHIP_DATABASE["STM32F411CC"] = ChipConfig(
-        name="STM32F411CC",
-        part_number="STM32F411CCU6",
-        family=ChipFamily.STM32F4,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=256,
-            sector_size=16*1024,
-            sector_count=16
-        ),
-        ram=RamConfig(
-            size=128,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 64*1024),
-                "SRAM2": (0x20010000, 64*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=100000000,
-            ahb=100000000,
-            apb1=50000000,
-            apb2=100000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=3, has_spi=3, has_uart=6,
-            has_can=0, has_usb=True, has_eth=False,
-            has_adc=10, has_pwm=10, has_gpio=50
-        ),
-        package="UFQFPN48",
-        openocd_target="stm32f4x"
-    )
-    
-    # ============ STM32F1xx 系列 ============
-    
-    # STM32F103
-    CHIP_DATABASE["STM32F103RB"] = ChipConfig(
-        name="STM32F103RB",
-        part_number="STM32F103RBT6",
-        family=ChipFamily.STM32F1,
-        cortex=Cortex.M3,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=128,
-            sector_size=2*1024,
-            sector_count=64,
-            page_size=2*1024
-        ),
-        ram=RamConfig(
-            size=20,
-            start=0x20000000,
-            sections={
-                "SRAM": (0x20000000, 20*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=72000000,
-            ahb=72000000,
-            apb1=36000000,
-            apb2=72000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=2, has_spi=2, has_uart=3,
-            has_can=1, has_usb=True, has_eth=False,
-            has_adc=16, has_pwm=4, has_gpio=51
-        ),
-        package="LQFP64",
-        voltage=(2.0, 3.6),
-        openocd_target="stm32f1x",
-        openocd_flash_driver="stm32f2x"
-    )
-    
-    # ============ STM32F7xx 系列 ============
-    
-    # STM32F767
-    CHIP_DATABASE["STM32F767ZI"] = ChipConfig(
-        name="STM32F767ZI",
-        part_number="STM32F767ZIT6",
-        family=ChipFamily.STM32F7,
-        cortex=Cortex.M7,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=2048,  # 2MB
-            sector_size=32*1024,
-            sector_count=64
-        ),
-        ram=RamConfig(
-            size=512,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 240*1024),
-                "SRAM2": (0x20040000, 16*1024),
-                "SRAM3": (0x2007C000, 64*1024),
-                "DTCM": (0x20000000, 128*1024),
-                "ITCM": (0x00000000, 64*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=216000000,
-            ahb=216000000,
-            apb1=54000000,
-            apb2=108000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=4, has_spi=6, has_uart=8,
-            has_can=2, has_usb=True, has_eth=True,
-            has_adc=24, has_pwm=26, has_gpio=140
-        ),
-        package="LQFP144",
-        voltage=(1.7, 3.6),
-        openocd_target="stm32f7x",
-        openocd_flash_driver="stm32f7x"
-    )
-    
-    # ============ STM32H7xx 系列 ============
-    
-    # STM32H743
-    CHIP_DATABASE["STM32H743ZI"] = ChipConfig(
-        name="STM32H743ZI",
-        part_number="STM32H743ZIT6U",
-        family=ChipFamily.STM32H7,
-        cortex=Cortex.M7,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=2048,
-            sector_size=128*1024,
-            sector_count=16
-        ),
-        ram=RamConfig(
-            size=1024,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 128*1024),
-                "SRAM2": (0x20020000, 128*1024),
-                "SRAM3": (0x20040000, 32*1024),
-                "SRAM4": (0x2007C000, 64*1024),
-                "DTCM1": (0x20000000, 128*1024),
-                "ITCM": (0x00000000, 64*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=400000000,
-            ahb=200000000,
-            apb1=100000000,
-            apb2=100000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=4, has_spi=6, has_uart=8,
-            has_can=2, has_usb=True, has_eth=True,
-            has_adc=20, has_pwm=34, has_gpio=140
-        ),
-        package="LQFP144",
-        voltage=(1.62, 3.6),
-        openocd_target="stm32h7x",
-        openocd_flash_driver="stm32h7x"
-    )
-    
-    # ============ STM32L4xx 系列 ============
-    
-    # STM32L475
-    CHIP_DATABASE["STM32L475RG"] = ChipConfig(
-        name="STM32L475RG",
-        part_number="STM32L475RGT6",
-        family=ChipFamily.STM32L4,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=1024,
-            sector_size=2*1024,
-            sector_count=512,
-            page_size=2*1024
-        ),
-        ram=RamConfig(
-            size=96,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 64*1024),
-                "SRAM2": (0x20010000, 32*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=80000000,
-            ahb=80000000,
-            apb1=40000000,
-            apb2=80000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=3, has_spi=3, has_uart=6,
-            has_can=2, has_usb=True, has_eth=False,
-            has_adc=16, has_pwm=16, has_gpio=52
-        ),
-        package="LQFP64",
-        voltage=(1.71, 3.6),
-        openocd_target="stm32l4x"
-    )
-    
-    # ============ STM32G4xx 系列 ============
-    
-    # STM32G431
-    CHIP_DATABASE["STM32G431CB"] = ChipConfig(
-        name="STM32G431CB",
-        part_number="STM32G431CBU6",
-        family=ChipFamily.STM32G4,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=128,
-            sector_size=2*1024,
-            sector_count=64
-        ),
-        ram=RamConfig(
-            size=32,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 32*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=170000000,
-            ahb=170000000,
-            apb1=85000000,
-            apb2=170000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=3, has_spi=3, has_uart=6,
-            has_can=2, has_usb=True, has_eth=False,
-            has_adc=12, has_pwm=14, has_gpio=52
-        ),
-        package="UFQFPN48",
-        voltage=(1.71, 3.6),
-        temp_range=(-40, 125),
-        openocd_target="stm32g4x"
-    )
-    
-    # ============ STM32WBxx 系列 ============
-    
-    # STM32WB55
-    CHIP_DATABASE["STM32WB55RG"] = ChipConfig(
-        name="STM32WB55RG",
-        part_number="STM55RGGU6",
-        family=ChipFamily.STM32WB,
-        cortex=Cortex.M4,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=512,
-            sector_size=4*1024,
-            sector_count=128
-        ),
-        ram=RamConfig(
-            size=192,
-            start=0x20000000,
-            sections={
-                "SRAM1": (0x20000000, 128*1024),
-                "SRAM2": (0x20020000, 64*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=64000000,
-            ahb=64000000,
-            apb1=32000000,
-            apb2=64000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=2, has_spi=3, has_uart=6,
-            has_can=2, has_usb=True, has_eth=False,
-            has_adc=16, has_pwm=14, has_gpio=82
-        ),
-        package="UFQFPN68",
-        voltage=(1.65, 3.6),
-        openocd_target="stm32wbx"
-    )
+
+# 芯片数据库文件 (纯数据, 首次使用时加载, 按需构建 ChipConfig)
+_CHIP_SPECS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "stm32_chips.json")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_specs() -> Dict[str, dict]:
+    """加载芯片数据库"""
+    with open(_CHIP_SPECS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _ChipIndex(NamedTuple):
+    """芯片名查找索引"""
+    names_upper: Dict[str, str]   # 大写芯片名 -> 规范名
+    substrings: Dict[str, str]    # 芯片名子串 -> 第一个包含它的规范名
+    name_lengths: List[int]       # 芯片名长度 (降序)
+    name_re: "re.Pattern"         # 所有芯片名的交替正则 (长名优先)
+
+
+@functools.lru_cache(maxsize=None)
+def _chip_index() -> _ChipIndex:
+    """构建芯片名索引 (首次查找时构建一次)"""
+    specs = _load_specs()
+    names_upper = {name.upper(): name for name in specs}
     
-    # ============ STM32G0xx 系列 ============
+    substrings: Dict[str, str] = {}
+    for name_upper, name in names_upper.items():
+        for start in range(len(name_upper)):
+            for end in range(start + 1, len(name_upper) + 1):
+                substrings.setdefault(name_upper[start:end], name)
     
-    # STM32G071
-    CHIP_DATABASE["STM32G071KB"] = ChipConfig(
-        name="STM32G071KB",
-        part_number="STM32G071KBT6",
-        family=ChipFamily.STM32G0,
-        cortex=Cortex.M0P,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=128,
-            sector_size=2*1024,
-            sector_count=64
-        ),
-        ram=RamConfig(
-            size=36,
-            start=0x20000000,
-            sections={
-                "SRAM": (0x20000000, 36*1024)
-            }
-        ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=64000000,
-            ahb=64000000,
-            apb1=32000000,
-            apb2=32000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=2, has_spi=2, has_uart=8,
-            has_can=0, has_usb=True, has_eth=False,
-            has_adc=12, has_pwm=10, has_gpio=57
-        ),
-        package="LQFP32",
-        voltage=(1.65, 3.6),
-        temp_range=(-40, 85),
-        openocd_target="stm32g0x",
-        openocd_flash_driver="stm32g0x"
+    return _ChipIndex(
+        names_upper=names_upper,
+        substrings=substrings,
+        name_lengths=sorted({len(name) for name in names_upper}, reverse=True),
+        name_re=re.compile(
+            "|".join(map(re.escape, sorted(specs, key=len, reverse=True)))
+        )
     )
-    
-    # ============ STM32C0xx 系列 ============
-    
-    # STM32C031
-    CHIP_DATABASE["STM32C031C6"] = ChipConfig(
-        name="STM32C031C6",
-        part_number="STM32C031C6U6",
-        family=ChipFamily.STM32C0,
-        cortex=Cortex.M0P,
-        flash=FlashConfig(
-            start=0x08000000,
-            size=32,
-            sector_size=2*1024,
-            sector_count=16
-        ),
+
+
+# 系列代号 -> 代表芯片
+_FAMILY_MATCH: Dict[str, str] = {
+    "F405": "STM32F405RG",
+    "F407": "STM32F407VG",
+    "F103": "STM32F103RB",
+    "F401": "STM32F401CC",
+    "F411": "STM32F411CC",
+    "F767": "STM32F767ZI",
+    "H743": "STM32H743ZI",
+    "L475": "STM32L475RG",
+    "G431": "STM32G431CB",
+    "G071": "STM32G071KB",
+    "WB55": "STM32WB55RG",
+    "C031": "STM32C031C6"
+}
+_FAMILY_RE = re.compile("|".join(map(re.escape, _FAMILY_MATCH)))
+
+
+def _parse_int(value) -> int:
+    """解析整数字段 (支持 "0x08000000" 十六进制和 "16K" / "1M" 容量字符串)"""
+    if not isinstance(value, str):
+        return value
+    if value[-1] in _SIZE_UNITS:
+        return int(value[:-1]) * _SIZE_UNITS[value[-1]]
+    return int(value, 0)
+
+
+# 共享的嵌套配置 (享元): 字段相同的芯片复用同一实例
+_SHARED_CONFIGS: Dict[tuple, object] = {}
+
+
+def _shared(config_cls, **fields):
+    """获取共享的 FlashConfig / ClockConfig / Peripherals 实例"""
+    key = (config_cls, *sorted(fields.items()))
+    config = _SHARED_CONFIGS.get(key)
+    if config is None:
+        config = _SHARED_CONFIGS[key] = config_cls(**fields)
+    return config
+
+
+@functools.lru_cache(maxsize=None)
+def _build_chip(chip_name: str) -> ChipConfig:
+    """由芯片数据库构建 ChipConfig (每个芯片只构建一次)"""
+    spec = dict(_load_specs()[chip_name])
+    flash = {key: _parse_int(value) for key, value in spec.pop("flash").items()}
+    ram = spec.pop("ram")
+    
+    return ChipConfig(
+        name=chip_name,
+        family=ChipFamily(spec.pop("family")),
+        cortex=Cortex(spec.pop("cortex")),
+        flash=_shared(FlashConfig, **flash),
         ram=RamConfig(
-            size=12,
-            start=0x20000000,
+            size=ram["size"],
+            start=_parse_int(ram["start"]),
             sections={
-                "SRAM": (0x20000000, 12*1024)
+                section: (_parse_int(start), _parse_int(size))
+                for section, (start, size) in ram["sections"].items()
             }
         ),
-        clock=ClockConfig(
-            hse=8000000,
-            sysclk=48000000,
-            ahb=48000000,
-            apb1=48000000,
-            apb2=48000000
-        ),
-        peripherals=Peripherals(
-            has_i2c=2, has_spi=2, has_uart=8,
-            has_can=0, has_usb=False, has_eth=False,
-            has_adc=12, has_pwm=5, has_gpio=30
-        ),
-        package="UFQFPN28",
-        voltage=(1.65, 3.6),
-        temp_range=(-40, 85),
-        openocd_target="stm32c0x"
+        clock=_shared(ClockConfig, **spec.pop("clock")),
+        peripherals=_shared(Peripherals, **spec.pop("peripherals")),
+        **spec
     )
 
 
-# 初始化
-_init_chip_database()
+def _dumps(obj) -> str:
+    """格式化 JSON 输出 (有 orjson 时使用 orjson)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
 
 
 # ============ API 函数 ============
 
+@functools.lru_cache(maxsize=128)
 def get_chip_config(chip_name: str) -> Optional[ChipConfig]:
     """
     获取芯片配置
     
+    结果会被缓存并在调用方之间共享, 调用方不应修改返回的 ChipConfig。
+    
     Args:
         chip_name: 芯片名称 (如 "STM32F407VG", "STM32F103RB", "STM32H743")
         
@@ -631,41 +297,33 @@ def get_chip_config(chip_name: str) -> Optional[ChipConfig]:
         ChipConfig 或 None
     """
     # 直接匹配
-    if chip_name in CHIP_DATABASE:
-        return CHIP_DATABASE[chip_name]
+    if chip_name in _load_specs():
+        return _build_chip(chip_name)
     
     # 模糊匹配 (部分名称)
     chip_upper = chip_name.upper()
-    for name, config in CHIP_DATABASE.items():
-        if chip_upper in name.upper() or name.upper() in chip_upper:
-            return config
+    index = _chip_index()
+    if chip_upper in index.substrings:
+        return _build_chip(index.substrings[chip_upper])
     
-    # 尝试匹配系列
-    family_match = {
-        "F405": "STM32F405RG",
-        "F407": "STM32F407VG",
-        "F103": "STM32F103RB",
-        "F401": "STM32F401CC",
-        "F411": "STM32F411CC",
-        "F767": "STM32F767ZI",
-        "H743": "STM32H743ZI",
-        "L475": "STM32L475RG",
-        "G431": "STM32G431CB",
-        "G071": "STM32G071KB",
-        "WB55": "STM32WB55RG",
-        "C031": "STM32C031C6"
-    }
+    # 查询中包含完整芯片名 (如 "STM32F407VGT6")
+    for length in index.name_lengths:
+        for start in range(len(chip_upper) - length + 1):
+            name = index.names_upper.get(chip_upper[start:start + length])
+            if name:
+                return _build_chip(name)
     
-    for key, full_name in family_match.items():
-        if key in chip_upper:
-            return CHIP_DATABASE.get(full_name)
+    # 尝试匹配系列
+    match = _FAMILY_RE.search(chip_upper)
+    if match:
+        return _build_chip(_FAMILY_MATCH[match.group(0)])
     
     return None
 
 
 def list_supported_chips() -> list:
     """列出所有支持的芯片"""
-    return list(CHIP_DATABASE.keys())
+    return list(_load_specs())
 
 
 def detect_chip_from_elf(elf_path: str) -> Optional[ChipConfig]:
@@ -678,56 +336,68 @@ def detect_chip_from_elf(elf_path: str) -> Optional[ChipConfig]:
     Returns:
         ChipConfig 或 None
     """
+    import subprocess
+    
     try:
-        import subprocess
-        result = subprocess.run(
+        proc = subprocess.Popen(
             ["arm-none-eabi-readelf", "-p", ".rodata", elf_path],
-            capture_output=True,
-            text=True
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+            bufsize=1
         )
-        
-        if result.returncode != 0:
-            return None
-        
-        # 查找芯片标识
-        for line in result.stdout.split('\n'):
-            if "STM32" in line:
-                for chip_name in CHIP_DATABASE.keys():
-                    if chip_name in line:
-                        return CHIP_DATABASE[chip_name]
-    except:
-        pass
+    except OSError:
+        return None
+    
+    # 逐行查找芯片标识, 命中即停止 readelf
+    name_re = _chip_index().name_re
+    with proc:
+        for line in proc.stdout:
+            match = name_re.search(line)
+            if match:
+                proc.terminate()
+                return _build_chip(match.group(0))
     
     return None
 
 
+# OpenOCD 配置缓存 (芯片名 -> 配置字典)
+_OPENOCD_CONFIGS: Dict[str, dict] = {}
+
+
 def get_openocd_config(chip_config: ChipConfig) -> dict:
     """
     生成 OpenOCD 配置文件
     
+    结果按芯片名缓存并共享, 调用方不应修改返回的字典。
+    
     Args:
         chip_config: 芯片配置
         
     Returns:
         OpenOCD 配置字典
     """
-    return {
-        "source": f"target/{chip_config.openocd_target}.cfg",
-        "flash": {
-            "driver": chip_config.openocd_flash_driver,
-            "start": hex(chip_config.flash.start),
-            "size_kb": chip_config.flash.size,
-            "chip_name": chip_config.name
-        },
-        "ram": {
-            "start": hex(chip_config.ram.start),
-            "size_kb": chip_config.ram.size
-        },
-        "clock": {
-            "hse": chip_config.clock.hse,
-            "sysclk": chip_config.clock.sysclk
+    cfg = _OPENOCD_CONFIGS.get(chip_config.name)
+    if cfg is None:
+        cfg = _OPENOCD_CONFIGS[chip_config.name] = {
+            "source": f"target/{chip_config.openocd_target}.cfg",
+            "flash": {
+                "driver": chip_config.openocd_flash_driver,
+                "start": chip_config.flash.start_hex,
+                "size_kb": chip_config.flash.size,
+                "chip_name": chip_config.name
+            },
+            "ram": {
+                "start": chip_config.ram.start_hex,
+                "size_kb": chip_config.ram.size
+            },
+            "clock": {
+                "hse": chip_config.clock.hse,
+                "sysclk": chip_config.clock.sysclk
+            }
         }
-    }
+    return cfg
 
 
 def print_chip_info(chip_name: str):
@@ -735,43 +405,101 @@ def print_chip_info(chip_name: str):
     config = get_chip_config(chip_name)
     
     if not config:
-        print(f"未知芯片: {chip_name}")
-        print(f"\n支持的芯片:")
-        for name in sorted(CHIP_DATABASE.keys()):
-            print(f"  - {name}")
+        names = "\n".join(f"  - {name}" for name in sorted(_load_specs()))
+        sys.stdout.write(f"未知芯片: {chip_name}\n\n支持的芯片:\n{names}\n")
         return
     
-    print(f"\n{'='*60}")
-    print(f"  {config.name}")
-    print(f"{'='*60}")
-    print(f"系列: {config.family.value}")
-    print(f"内核: {config.cortex.value}")
-    print(f"\n内存:")
-    print(f"  Flash: {config.flash.size}KB @ {hex(config.flash.start)}")
-    print(f"  RAM:   {config.ram.size}KB @ {hex(config.ram.start)}")
-    print(f"\n时钟:")
-    print(f"  SYSCLK: {config.clock.sysclk/1e6:.0f}MHz")
-    print(f"  AHB:    {config.clock.ahb/1e6:.0f}MHz")
-    print(f"  APB1:   {config.clock.apb1/1e6:.0f}MHz")
-    print(f"  APB2:   {config.clock.apb2/1e6:.0f}MHz")
-    print(f"\n外设:")
-    print(f"  I2C: {config.peripherals.has_i2c}")
-    print(f"  SPI: {config.peripherals.has_spi}")
-    print(f"  UART: {config.peripherals.has_uart}")
-    print(f"  USB: {'有' if config.peripherals.has_usb else '无'}")
-    print(f"  ETH: {'有' if config.peripherals.has_eth else '无'}")
-    print(f"\n功耗:")
-    print(f"  电压: {config.voltage[0]}-{config.voltage[1]}V")
-    print(f"  温度: {config.temp_range[0]}~{config.temp_range[1]}°C")
-    print(f"\n封装: {config.package}")
-    print(f"\nOpenOCD:")
-    print(f"  Target: {config.openocd_target}")
-    print(f"{'='*60}\n")
+    rule = "=" * 60
+    sys.stdout.write(f"""
+{rule}
+  {config.name}
+{rule}
+系列: {config.family.value}
+内核: {config.cortex.value}
+
+内存:
+  Flash: {config.flash.size}KB @ {config.flash.start_hex}
+  RAM:   {config.ram.size}KB @ {config.ram.start_hex}
+
+时钟:
+  SYSCLK: {config.clock.sysclk/1e6:.0f}MHz
+  AHB:    {config.clock.ahb/1e6:.0f}MHz
+  APB1:   {config.clock.apb1/1e6:.0f}MHz
+  APB2:   {config.clock.apb2/1e6:.0f}MHz
+
+外设:
+  I2C: {config.peripherals.has_i2c}
+  SPI: {config.peripherals.has_spi}
+  UART: {config.peripherals.has_uart}
+  USB: {'有' if config.peripherals.has_usb else '无'}
+  ETH: {'有' if config.peripherals.has_eth else '无'}
+
+功耗:
+  电压: {config.voltage[0]}-{config.voltage[1]}V
+  温度: {config.temp_range[0]}~{config.temp_range[1]}°C
+
+封装: {config.package}
+
+OpenOCD:
+  Target: {config.openocd_target}
+{rule}
+
+""")
 
 
 # ============ 主程序 ============
 
-def main():
+DEFAULT_CHIP = "STM32F407VG"
+
+
+def _cmd_list(_):
+    """列出所有支持芯片"""
+    lines = "\n".join(
+        f"  {name:20s} ({spec['family']}, {spec['cortex']})"
+        for name, spec in sorted(_load_specs().items())
+    )
+    sys.stdout.write(f"\n支持的 STM32 芯片:\n{lines}\n\n")
+
+
+def _cmd_from_elf(elf_path: str):
+    """从ELF文件检测芯片"""
+    config = detect_chip_from_elf(elf_path)
+    if config:
+        print(f"检测到芯片: {config.name}")
+        print_chip_info(config.name)
+    else:
+        print("无法检测芯片型号")
+
+
+def _cmd_openocd(chip_name: str):
+    """输出OpenOCD配置"""
+    config = get_chip_config(chip_name)
+    if config:
+        print(_dumps(get_openocd_config(config)))
+    else:
+        print(f"未知芯片: {chip_name}")
+
+
+# 命令分发表 (按优先级排列: 参数名 -> 处理函数)
+_COMMANDS = {
+    "list": _cmd_list,
+    "from_elf": _cmd_from_elf,
+    "openocd": _cmd_openocd,
+    "chip": print_chip_info,
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    
+    # 快速路径: 无参数或 --chip X 时无需 argparse
+    if not argv:
+        print_chip_info(DEFAULT_CHIP)
+        return
+    if len(argv) == 2 and argv[0] in ("--chip", "-c"):
+        print_chip_info(argv[1])
+        return
+    
     import argparse
     parser = argparse.ArgumentParser(
         description="STM32 芯片配置工具",
@@ -794,36 +522,15 @@ def main():
     parser.add_argument('--from-elf', '-e', help='从ELF文件检测')
     parser.add_argument('--openocd', '-o', help='生成OpenOCD配置')
     
-    args = parser.parse_args()
-    
-    if args.list:
-        print("\n支持的 STM32 芯片:")
-        for name in sorted(CHIP_DATABASE.keys()):
-            config = CHIP_DATABASE[name]
-            print(f"  {name:20s} ({config.family.value}, {config.cortex.value})")
-        print()
-    
-    elif args.from_elf:
-        config = detect_chip_from_elf(args.from_elf)
-        if config:
-            print(f"检测到芯片: {config.name}")
-            print_chip_info(config.name)
-        else:
-            print("无法检测芯片型号")
+    args = parser.parse_args(argv)
     
-    elif args.openocd:
-        config = get_chip_config(args.openocd)
-        if config:
-            cfg = get_openocd_config(config)
-            print(json.dumps(cfg, indent=2))
-        else:
-            print(f"未知芯片: {args.openocd}")
+    for name, command in _COMMANDS.items():
+        value = getattr(args, name)
+        if value:
+            command(value)
+            return
     
-    elif args.chip:
-        print_chip_info(args.chip)
-    
-    else:
-        print_chip_info("STM32F407VG")
+    print_chip_info(DEFAULT_CHIP)
 
 
 if __name__ == "__main__":
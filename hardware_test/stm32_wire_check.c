@@ -47,6 +47,7 @@ const Command_t COMMANDS[] = {
     {"GET_BATTERY", "获取电池电压", cmd_get_battery},
     {"GET_ESP32_STATUS", "获取ESP32状态", cmd_get_esp32_status},
     {"WIRE_CHECK", "完整连线检测", cmd_wire_check_all},
+    {"ECHO", "回显参数", NULL},
 };
 
 #define CMD_COUNT (sizeof(COMMANDS) / sizeof(Command_t))
@@ -177,15 +178,13 @@ const char *cmd_wire_check_all(void) {
 
 // ============ 串口命令处理 ============
 
-#define RX_BUFFER_SIZE 64
+// 一行可容纳完整的 BATCH 命令 (wire_check.py 的全部检测约 90 字节)
+#define RX_BUFFER_SIZE 160
 char g_rx_buffer[RX_BUFFER_SIZE];
 uint8_t g_rx_index = 0;
 
-void process_command(const char *cmd) {
-    char response[128];
-    const char *result = NULL;
-    
-    // 解析命令
+// 执行单条命令, 未知命令返回 NULL
+const char *run_command(const char *cmd) {
     for (int i = 0; i < CMD_COUNT; i++) {
         if (strncmp(cmd, COMMANDS[i].cmd, strlen(COMMANDS[i].cmd)) == 0) {
             // 提取参数
@@ -193,14 +192,57 @@ void process_command(const char *cmd) {
             while (*arg == ' ') arg++;
             
             if (strcmp(COMMANDS[i].cmd, "ECHO") == 0) {
-                result = cmd_echo(arg);
-            } else {
-                result = COMMANDS[i].func();
+                return cmd_echo(arg);
             }
+            return COMMANDS[i].func();
+        }
+    }
+    return NULL;
+}
+
+// BATCH cmd1;cmd2;... 依次执行各命令, 一行返回 "resp1;resp2;...;END"
+// 响应缓冲区不够时提前结束, 主机发现响应数不对会逐条重发
+void process_batch(const char *cmds) {
+    static char response[512];
+    const size_t end_len = sizeof("END\r\n");
+    char cmd[RX_BUFFER_SIZE];
+    size_t len = 0;
+    
+    while (*cmds) {
+        const char *sep = strchr(cmds, ';');
+        size_t n = sep ? (size_t)(sep - cmds) : strlen(cmds);
+        memcpy(cmd, cmds, n);
+        cmd[n] = '\0';
+        
+        const char *result = run_command(cmd);
+        int written = result
+            ? snprintf(response + len, sizeof(response) - len, "%s;", result)
+            : snprintf(response + len, sizeof(response) - len,
+                       "FAIL[UNKNOWN_CMD:%s];", cmd);
+        if (written < 0 || len + written + end_len > sizeof(response)) {
             break;
         }
+        len += written;
+        
+        cmds = sep ? sep + 1 : cmds + n;
     }
     
+    snprintf(response + len, sizeof(response) - len, "END\r\n");
+    HAL_UART_Transmit(&UART_DEBUG, (uint8_t*)response, strlen(response), 100);
+}
+
+void process_command(const char *cmd) {
+    char response[128];
+    const char *result;
+    
+    if (strncmp(cmd, "BATCH ", 6) == 0) {
+        process_batch(cmd + 6);
+        return;
+    }
+    
+    // 解析命令
+    result = run_command(cmd);
+    
     if (result) {
         snprintf(response, sizeof(response), "%s\r\n", result);
     } else {
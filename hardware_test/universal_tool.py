@@ -17,10 +17,22 @@ from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass
 from device_config import (
     DeviceRegistry, DeviceAdapter, ToolAdapter,
-    DeviceConfig, init_devices, use_device
+    DeviceConfig, init_devices, use_device, list_devices
 )
 
 
+# 内置设备只需注册一次
+_devices_initialized = False
+
+
+def _ensure_devices():
+    """首次使用时注册内置设备"""
+    global _devices_initialized
+    if not _devices_initialized:
+        init_devices()
+        _devices_initialized = True
+
+
 @dataclass
 class ToolResult:
     """工具运行结果"""
@@ -42,8 +54,12 @@ class UniversalTool:
     """
     
     def __init__(self, device_name: str = None):
+        # ToolAdapter.adapt_* 结果缓存 (切换设备时清空)
+        self._adapter: Optional[DeviceAdapter] = None
+        self._tool_configs: Dict[str, Dict] = {}
+        
         # 初始化设备
-        init_devices()
+        _ensure_devices()
         
         # 选择设备
         if device_name:
@@ -62,6 +78,23 @@ class UniversalTool:
         self.device_name = self.adapter.config.name
         print(f"[INFO] 使用设备: {self.device_name}")
     
+    @property
+    def adapter(self) -> Optional[DeviceAdapter]:
+        return self._adapter
+    
+    @adapter.setter
+    def adapter(self, adapter: Optional[DeviceAdapter]):
+        self._adapter = adapter
+        self._tool_configs.clear()
+    
+    def _tool_config(self, tool: str) -> Dict:
+        """获取工具配置 (缓存 ToolAdapter.adapt_<tool> 的结果)"""
+        cfg = self._tool_configs.get(tool)
+        if cfg is None:
+            adapt = getattr(ToolAdapter, f"adapt_{tool}")
+            cfg = self._tool_configs[tool] = adapt(self.adapter.config)
+        return cfg
+    
     # ============ 工具方法 ============
     
     def run_check(self) -> ToolResult:
@@ -70,7 +103,7 @@ class UniversalTool:
         print(f"  连线检测 - {self.device_name}")
         print("="*50)
         
-        cfg = ToolAdapter.adapt_wire_check(self.adapter.config)
+        cfg = self._tool_config('wire_check')
         print(f"串口: {cfg['port']}")
         print(f"波特率: {cfg['baud']}")
         print(f"组件: {cfg['components']}")
@@ -82,13 +115,19 @@ class UniversalTool:
             data=cfg
         )
     
-    def run_monitor(self, duration: int = 10) -> ToolResult:
-        """运行实时监控"""
+    def run_monitor(self, duration: int = 10,
+                    progress_callback: Optional[Callable[[int, int], None]] = None
+                    ) -> ToolResult:
+        """
+        运行实时监控
+        
+        progress_callback(done, total) 每秒调用一次; 不传时只等待一次
+        """
         print("\n" + "="*50)
         print(f"  实时监控 - {self.device_name}")
         print("="*50)
         
-        cfg = ToolAdapter.adapt_monitor(self.adapter.config)
+        cfg = self._tool_config('monitor')
         
         print(f"串口: {cfg['port']}")
         print(f"波特率: {cfg['baud']}")
@@ -97,9 +136,16 @@ class UniversalTool:
         
         # 模拟监控
         print("\n监控中...")
-        for i in range(duration):
-            print(f"\r[{i+1}/{duration}] 采集数据...", end='', flush=True)
-            time.sleep(1)
+        if progress_callback is None:
+            time.sleep(duration)
+        else:
+            # 按起始时刻计算每次等待, 回调耗时不会累积误差
+            start = time.monotonic()
+            for i in range(1, duration + 1):
+                delay = start + i - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                progress_callback(i, duration)
         
         print(f"\n监控完成!")
         
@@ -116,7 +162,7 @@ class UniversalTool:
         print(f"  视觉检测 - {self.device_name}")
         print("="*50)
         
-        cfg = ToolAdapter.adapt_vision(self.adapter.config)
+        cfg = self._tool_config('vision')
         print(f"检测目标: {cfg['detection_targets']}")
         
         return ToolResult(
@@ -132,7 +178,7 @@ class UniversalTool:
         print(f"  电流监控 - {self.device_name}")
         print("="*50)
         
-        cfg = ToolAdapter.adapt_ina219(self.adapter.config)
+        cfg = self._tool_config('ina219')
         print(f"最大电流: {cfg['max_current_ma']}mA")
         print(f"电压范围: {cfg['voltage_range'][0]}-{cfg['voltage_range'][1]}V")
         
@@ -183,25 +229,45 @@ class UniversalTool:
         }
 
 
+def print_progress(done: int, total: int):
+    """在同一行打印监控进度"""
+    print(f"\r[{done}/{total}] 采集数据...", end='', flush=True)
+
+
 # ============ 设备管理 ============
 
 class DeviceManager:
     """设备管理器"""
     
     def __init__(self):
-        init_devices()
+        _ensure_devices()
         self.current_device = None
+        # 按设备名复用的 UniversalTool (设备重新注册后重建)
+        self._tools: Dict[str, UniversalTool] = {}
     
     def add(self, name: str, **kwargs) -> bool:
         """添加设备"""
         from device_config import register_generic_robot
         register_generic_robot(name, **kwargs)
+        self._tools.pop(name, None)
         return True
     
-    def use(self, name: str) -> UniversalTool:
-        """切换设备"""
+    def use(self, name: Optional[str] = None) -> UniversalTool:
+        """切换设备 (未指定时使用第一个已注册的设备)"""
+        if name is None:
+            devices = list_devices()
+            name = devices[0] if devices else None
+        
+        tool = self._tools.get(name)
+        if tool is not None and tool.adapter.config is DeviceRegistry.get(name):
+            # 复用实例, 但每次都重新设为当前设备
+            DeviceRegistry.set_current(name)
+        else:
+            tool = UniversalTool(name)
+            self._tools[name] = tool
+        
         self.current_device = name
-        return UniversalTool(name)
+        return tool
     
     def list(self) -> List[str]:
         """列出设备"""
@@ -215,35 +281,46 @@ class DeviceManager:
         return {}
 
 
+_manager: Optional[DeviceManager] = None
+
+
+def _get_manager() -> DeviceManager:
+    """进程内共享的 DeviceManager"""
+    global _manager
+    if _manager is None:
+        _manager = DeviceManager()
+    return _manager
+
+
 # ============ 快捷函数 ============
 
 def check(device: str = None) -> ToolResult:
     """连线检测"""
-    tool = UniversalTool(device)
+    tool = _get_manager().use(device)
     return tool.run_check()
 
 
 def monitor(device: str = None, duration: int = 10) -> ToolResult:
     """实时监控"""
-    tool = UniversalTool(device)
+    tool = _get_manager().use(device)
     return tool.run_monitor(duration)
 
 
 def vision(device: str = None) -> ToolResult:
     """视觉检测"""
-    tool = UniversalTool(device)
+    tool = _get_manager().use(device)
     return tool.run_vision()
 
 
 def status(device: str = None) -> Dict:
     """设备状态"""
-    tool = UniversalTool(device)
+    tool = _get_manager().use(device)
     return tool.get_status()
 
 
 def all_tools(device: str = None) -> List[ToolResult]:
     """运行所有工具"""
-    tool = UniversalTool(device)
+    tool = _get_manager().use(device)
     return tool.run_all()
 
 
@@ -299,7 +376,7 @@ def main():
     args = parser.parse_args()
     
     # 初始化
-    manager = DeviceManager()
+    manager = _get_manager()
     
     if args.list:
         devices = manager.list()
@@ -323,7 +400,7 @@ def main():
             tool.run_check()
         
         if args.monitor:
-            tool.run_monitor(args.monitor)
+            tool.run_monitor(args.monitor, progress_callback=print_progress)
         
         if args.vision:
             tool.run_vision()
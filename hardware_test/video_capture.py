@@ -14,16 +14,28 @@
     python video_capture.py --output robot_test_20260218.mp4
 """
 
+from __future__ import annotations
+
 import cv2
+import math
 import time
 import argparse
 import json
+import queue
+import shutil
+import subprocess
+import threading
 from datetime import datetime
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 @dataclass
 class FrameInfo:
@@ -35,16 +47,221 @@ class FrameInfo:
     roi: Tuple[int, int, int, int]  # x, y, w, h
 
 
+# pollKey (OpenCV >= 4.5) 不会像 waitKey(1) 那样至少阻塞 1 ms
+_poll_key = getattr(cv2, 'pollKey', None) or (lambda: cv2.waitKey(1))
+
+
+class FFmpegWriter:
+    """
+    通过 ffmpeg 管道进行 H.264 硬件编码的视频写入器
+    
+    接口与 cv2.VideoWriter 一致 (write/release/isOpened),
+    优先使用 NVENC / VideoToolbox / VAAPI, 都不可用时使用 libx264。
+    
+    MP4/MOV 输出使用分片格式, 元数据随数据流写出, 录制中断时文件仍可播放;
+    指定 segment_time 时按该时长 (秒) 切分为 name_000.mp4, name_001.mp4 ...
+    
+    ffmpeg 在收到第一帧时启动, 按该帧的实际尺寸编码 (摄像头可能不支持请求的分辨率);
+    进程退出后 isOpened() 返回 False, 调用方应改用其他写入器。
+    """
+    
+    # 分片 MP4: 每个关键帧开始新分片, 不在结束时回写 moov
+    FRAGMENTED_MOVFLAGS = '+frag_keyframe+empty_moov+default_base_moof'
+    
+    # (编码器, 额外参数), 按优先级排列
+    # 输出 yuv420p: bgr24 输入时 libx264/NVENC 默认选 4:4:4, 多数播放器无法解码
+    ENCODERS = [
+        ('h264_nvenc', ['-preset', 'p1', '-pix_fmt', 'yuv420p']),
+        ('h264_videotoolbox', ['-realtime', '1', '-pix_fmt', 'yuv420p']),
+        ('h264_vaapi', ['-vaapi_device', '/dev/dri/renderD128',
+                        '-vf', 'format=nv12,hwupload']),
+        ('libx264', ['-preset', 'ultrafast', '-pix_fmt', 'yuv420p']),
+    ]
+    
+    # 第一帧写入后等待的时间 (秒), 用于发现编码器初始化失败
+    STARTUP_CHECK = 0.5
+    
+    # 各 ffmpeg 可执行文件选出的编码器 (测试编码较慢, 只做一次)
+    _encoder_cache: Dict[str, Optional[Tuple[str, List[str]]]] = {}
+    
+    def __init__(self, output_path: str, fps: int, resolution: Tuple[int, int],
+                 ffmpeg: str = 'ffmpeg', segment_time: Optional[int] = None):
+        self.output_path = output_path
+        self.fps = fps
+        self.resolution = resolution  # 仅作参考, 实际按第一帧的尺寸
+        self.ffmpeg = ffmpeg
+        self.segment_time = segment_time
+        self.encoder = self._select_encoder(ffmpeg)
+        self._proc: Optional[subprocess.Popen] = None
+        self._frame_shape: Optional[Tuple[int, ...]] = None
+        self._failed = self.encoder is None
+    
+    def _launch(self, width: int, height: int) -> bool:
+        """按帧尺寸启动 ffmpeg 编码进程"""
+        codec, extra_args = self.encoder
+        cmd = [
+            self.ffmpeg, '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', str(self.fps),
+            '-i', '-',
+            '-c:v', codec, *extra_args,
+            *self._output_args(self.output_path, self.segment_time),
+        ]
+        try:
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        except OSError as e:
+            self._fail(f"无法启动 ffmpeg: {e}")
+            return False
+        return True
+    
+    def _fail(self, message: str):
+        """记录失败并结束编码进程, 之后 isOpened() 返回 False"""
+        print(f"[ERROR] {message}: {self.output_path}")
+        self._failed = True
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+    
+    @classmethod
+    def _output_args(cls, output_path: str, segment_time: Optional[int]) -> List[str]:
+        """输出容器相关参数"""
+        path = Path(output_path)
+        movflags = cls.FRAGMENTED_MOVFLAGS if path.suffix.lower() in ('.mp4', '.mov') else None
+        
+        if segment_time:
+            args = ['-f', 'segment', '-segment_time', str(segment_time),
+                    '-reset_timestamps', '1']
+            if movflags:
+                args += ['-segment_format_options', f'movflags={movflags}']
+            return args + ['-y', str(path.with_name(f"{path.stem}_%03d{path.suffix}"))]
+        
+        args = ['-movflags', movflags] if movflags else []
+        return args + ['-y', output_path]
+    
+    @classmethod
+    def _select_encoder(cls, ffmpeg: str) -> Optional[Tuple[str, List[str]]]:
+        """选择第一个能完成测试编码的编码器 (结果按 ffmpeg 路径缓存)"""
+        if ffmpeg not in cls._encoder_cache:
+            cls._encoder_cache[ffmpeg] = cls._probe_encoders(ffmpeg)
+        return cls._encoder_cache[ffmpeg]
+    
+    @classmethod
+    def _probe_encoders(cls, ffmpeg: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        逐个测试编码一帧
+        
+        ffmpeg -encoders 列出的是编译进 ffmpeg 的编码器, 不代表硬件可用
+        (没有 NVIDIA 显卡或 /dev/dri 时 nvenc/vaapi 会在初始化时失败)。
+        """
+        if shutil.which(ffmpeg) is None:
+            return None
+        
+        try:
+            result = subprocess.run(
+                [ffmpeg, '-hide_banner', '-encoders'],
+                capture_output=True, text=True, timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        
+        built_in = set(
+            parts[1] for parts in map(str.split, result.stdout.splitlines())
+            if len(parts) >= 2
+        )
+        for codec, extra_args in cls.ENCODERS:
+            if codec not in built_in:
+                continue
+            cmd = [
+                ffmpeg, '-hide_banner', '-loglevel', 'error',
+                '-f', 'lavfi', '-i', 'color=s=256x256',
+                '-frames:v', '1', '-c:v', codec, *extra_args,
+                '-f', 'null', '-',
+            ]
+            try:
+                probe = subprocess.run(cmd, capture_output=True, timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            if probe.returncode == 0:
+                return codec, extra_args
+        return None
+    
+    def isOpened(self) -> bool:
+        if self._failed:
+            return False
+        # 第一帧之前尚未启动进程
+        return self._proc is None or self._proc.poll() is None
+    
+    def write(self, frame):
+        """写入一帧 (BGR, uint8)"""
+        if self._failed:
+            return
+        
+        starting = self._proc is None
+        if starting:
+            if not self._launch(frame.shape[1], frame.shape[0]):
+                return
+            self._frame_shape = frame.shape
+        elif frame.shape != self._frame_shape:
+            # 原始数据流没有帧边界, 尺寸不符的帧会让之后的画面全部错位
+            print(f"[WARN] 丢弃尺寸不符的帧: {frame.shape}, 应为 {self._frame_shape}")
+            return
+        
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, ValueError, OSError):
+            self._fail("ffmpeg 编码进程已退出")
+            return
+        
+        if starting:
+            # 编码器在收到第一帧时才初始化, 失败时进程很快退出
+            try:
+                self._proc.wait(timeout=self.STARTUP_CHECK)
+            except subprocess.TimeoutExpired:
+                return
+            self._fail("ffmpeg 编码器初始化失败")
+    
+    def release(self):
+        """关闭管道并等待编码完成"""
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._proc.wait()
+        self._proc = None
+
+
 class VideoRecorder:
     """视频录制器"""
     
+    # 运动检测在缩小后的帧上进行 (宽高各缩小 N 倍)
+    MOTION_DOWNSCALE = 4
+    # 无运动时机器人检测的刷新间隔 (帧)
+    ROBOT_REFRESH_INTERVAL = 15
+    # 机器人 (绿色) 的 HSV 范围
+    # 注: 按通道 LUT + bitwise_and 实测比单次 inRange 慢约 2.5 倍, 仍用 inRange
+    GREEN_HSV_LOWER = (30, 50, 50)
+    GREEN_HSV_UPPER = (90, 255, 255)
+    
     def __init__(self, 
                  output_path: str,
                  fps: int = 30,
-                 resolution: Tuple[int, int] = (1280, 720)):
+                 resolution: Tuple[int, int] = (1280, 720),
+                 preview_every: int = 1,
+                 segment_time: Optional[int] = None):
         self.output_path = output_path
         self.fps = fps
         self.resolution = resolution
+        # 每 N 帧刷新一次预览窗口 (录制仍是每帧)
+        self.preview_every = max(preview_every, 1)
+        # 按时长 (秒) 切分输出文件, 仅 ffmpeg 写入器支持
+        self.segment_time = segment_time
         
         self.cap: Optional[cv2.VideoCapture] = None
         self.writer = None
@@ -53,14 +270,40 @@ class VideoRecorder:
         self.start_time = 0
         
         # 运动检测
-        self.mog2 = cv2.createBackgroundSubtractorMOG2()
-        self.prev_frame = None
-        self.motion_threshold = 5000  # 像素变化阈值
+        self.prev_frame = None  # 缩小后的灰度帧
+        
+        # process_frame 复用的中间缓冲区 (首帧时分配)
+        self._hsv = None
+        self._value = None
+        self._gray = None
+        self._diff = None
+        self._green_mask = None
+        self._labels = None
+        
+        # 机器人检测
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        # 单个像素的灰度变化阈值
+        self.pixel_diff_threshold = 25
+        # 变化像素数阈值 (按缩小后的面积折算)
+        self.motion_threshold = 800 // (self.MOTION_DOWNSCALE ** 2)
         
         # 状态
         self.is_recording = False
         self.roi = (0, 0, 0, 0)
         self.motion_score = 0
+        self._last_has_robot = False
+        
+        # 标注文本缓存
+        self._ts_second = -1
+        self._ts_prefix = ""
+        self._fps_text = "FPS: 0.0"
+        
+        # 流水线: 采集线程 -> 主线程 (处理/显示) -> 写入线程
+        self._frame_queue: queue.Queue = queue.Queue(maxsize=2)
+        self._frame_wanted = threading.Event()  # 主线程已准备好处理下一帧
+        self._write_queue: queue.Queue = queue.Queue(maxsize=max(fps, 1))
+        self._capture_thread: Optional[threading.Thread] = None
+        self._writer_thread: Optional[threading.Thread] = None
     
     def start(self, device: int = 0) -> bool:
         """启动录制"""
@@ -74,12 +317,18 @@ class VideoRecorder:
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
         self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        # 驱动只保留最新一帧 (V4L2/AVFoundation 支持, 其他后端忽略)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         
-        # 创建视频写入器
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.writer = cv2.VideoWriter(
-            self.output_path, fourcc, self.fps, self.resolution
+        # 创建视频写入器 (优先 ffmpeg 硬件编码, 否则退回 OpenCV mp4v)
+        self.writer = FFmpegWriter(
+            self.output_path, self.fps, self.resolution,
+            segment_time=self.segment_time
         )
+        if self.writer.isOpened():
+            print(f"[INFO] 编码器: {self.writer.encoder[0]}")
+        else:
+            self.writer = self._open_cv_writer(self.resolution)
         
         if not self.writer.isOpened():
             print(f"[ERROR] 无法创建视频文件: {self.output_path}")
@@ -88,6 +337,15 @@ class VideoRecorder:
         self.running = True
         self.start_time = time.time()
         
+        self._capture_thread = threading.Thread(
+            target=self._capture_worker, name="capture", daemon=True
+        )
+        self._writer_thread = threading.Thread(
+            target=self._writer_worker, name="writer", daemon=True
+        )
+        self._capture_thread.start()
+        self._writer_thread.start()
+        
         print(f"[INFO] 开始录制: {self.output_path}")
         print(f"[INFO] 分辨率: {self.resolution}, FPS: {self.fps}")
         
@@ -97,9 +355,19 @@ class VideoRecorder:
         """停止录制"""
         self.running = False
         
+        if self._capture_thread:
+            self._capture_thread.join()
+            self._capture_thread = None
+        
         if self.cap:
             self.cap.release()
         
+        # 等待写入线程写完队列中剩余的帧
+        if self._writer_thread:
+            self._write_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+        
         if self.writer:
             self.writer.release()
         
@@ -107,37 +375,123 @@ class VideoRecorder:
         print(f"[INFO] 录制完成: {self.output_path}")
         print(f"[INFO] 时长: {duration:.1f}s, 帧数: {self.frame_idx}")
     
-    def process_frame(self, frame) -> Tuple[FrameInfo, frame]:
+    @staticmethod
+    def _put_latest(q: queue.Queue, item):
+        """放入有界队列, 队列满时丢弃最旧的元素"""
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def _capture_worker(self):
+        """
+        采集线程: 持续 grab() 清空驱动缓冲, 只在主线程需要时 retrieve() 解码
+        
+        处理跟不上时旧帧直接被丢弃而不解码, 主线程拿到的总是最新一帧。
+        """
+        while self.running:
+            if not self.cap.grab():
+                break
+            if self._frame_wanted.is_set():
+                self._frame_wanted.clear()
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    break
+                self._put_latest(self._frame_queue, frame)
+        
+        # 通知主线程采集结束
+        self._put_latest(self._frame_queue, None)
+    
+    def _open_cv_writer(self, size: Tuple[int, int]) -> cv2.VideoWriter:
+        """创建 OpenCV mp4v 写入器 (ffmpeg 不可用时使用)"""
+        if self.segment_time:
+            print("[WARN] ffmpeg 不可用, 不切分输出文件")
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        return cv2.VideoWriter(self.output_path, fourcc, self.fps, size)
+    
+    def _write(self, frame: np.ndarray):
+        """写入一帧; ffmpeg 进程退出时改用 OpenCV 写入器并重写该帧"""
+        self.writer.write(frame)
+        if isinstance(self.writer, FFmpegWriter) and not self.writer.isOpened():
+            self.writer.release()
+            self.writer = self._open_cv_writer((frame.shape[1], frame.shape[0]))
+            self.writer.write(frame)
+    
+    def _writer_worker(self):
+        """写入线程: 编码并写入视频文件"""
+        while True:
+            frame = self._write_queue.get()
+            if frame is None:
+                break
+            self._write(frame)
+    
+    def process_frame(self, frame: np.ndarray) -> Tuple[FrameInfo, np.ndarray]:
         """处理帧"""
+        if frame.dtype != np.uint8:
+            raise ValueError(f"只支持 8 位图像, 收到 {frame.dtype}")
+        
         self.frame_idx += 1
         timestamp = time.time() - self.start_time
         
-        # 运动检测
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (21, 21), 0)
+        # 颜色转换只做一次: HSV 供机器人检测, V 通道作为运动检测的灰度
+        # (所有中间结果写入复用的缓冲区, 尺寸变化时 OpenCV 会自动重新分配)
+        self._hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        hsv = self._hsv
+        
+        # 运动检测 (在缩小的帧上进行, 录制/标注仍使用原始帧)
+        height, width = frame.shape[:2]
+        self._value = cv2.extractChannel(hsv, 2, dst=self._value)
+        self._gray = cv2.resize(
+            self._value,
+            (width // self.MOTION_DOWNSCALE, height // self.MOTION_DOWNSCALE),
+            dst=self._gray,
+            interpolation=cv2.INTER_AREA
+        )
+        gray = cv2.GaussianBlur(self._gray, (7, 7), 0, dst=self._gray)
         
         motion_detected = False
         if self.prev_frame is not None:
-            diff = cv2.absdiff(self.prev_frame, gray)
-            self.motion_score = cv2.sumElems(diff)[0]
+            # 差分和二值化都在同一个 uint8 缓冲区内完成, 不做任何类型提升
+            diff = cv2.absdiff(self.prev_frame, gray, dst=self._diff)
+            cv2.threshold(diff, self.pixel_diff_threshold, 255, cv2.THRESH_BINARY, dst=diff)
+            self._diff = diff
+            # 只统计变化超过阈值的像素数, 不再对整幅差分图求和
+            self.motion_score = cv2.countNonZero(diff)
             motion_detected = self.motion_score > self.motion_threshold
         
-        self.prev_frame = gray
+        # 交换缓冲区: 本帧灰度成为 prev_frame, 旧的 prev_frame 留给下一帧写入
+        self.prev_frame, self._gray = gray, self.prev_frame
         
         # 机器人检测 (简化: 检测绿色区域)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        green_mask = cv2.inRange(hsv, (30, 50, 50), (90, 255, 255))
-        
-        # 找最大轮廓
-        contours, _ = cv2.findContours(green_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        has_robot = len(contours) > 0
+        # 画面无变化时沿用上次结果 (首帧起每 ROBOT_REFRESH_INTERVAL 帧强制刷新一次)
+        if motion_detected or (self.frame_idx - 1) % self.ROBOT_REFRESH_INTERVAL == 0:
+            self._green_mask = cv2.inRange(
+                hsv, self.GREEN_HSV_LOWER, self.GREEN_HSV_UPPER, dst=self._green_mask
+            )
+            green_mask = self._green_mask
+            
+            # 开运算去除噪点, 避免大量细碎区域
+            cv2.morphologyEx(green_mask, cv2.MORPH_OPEN, self._kernel, dst=green_mask)
+            
+            # 连通域统计直接给出每个区域的外接框和面积 (标签 0 为背景)
+            num_labels, self._labels, stats, _ = cv2.connectedComponentsWithStats(
+                green_mask, labels=self._labels, connectivity=8
+            )
+            self._last_has_robot = num_labels > 1
+            
+            if num_labels > 1:
+                # 取最大区域作为ROI
+                largest = 1 + int(stats[1:, cv2.CC_STAT_AREA].argmax())
+                x, y, w, h, area = (int(v) for v in stats[largest])
+                if area > 1000:  # 忽略小区域
+                    self.roi = (x, y, w, h)
         
-        if contours:
-            # 取最大轮廓作为ROI
-            largest = max(contours, key=cv2.contourArea)
-            x, y, w, h = cv2.boundingRect(largest)
-            if cv2.contourArea(largest) > 1000:  # 忽略小区域
-                self.roi = (x, y, w, h)
+        has_robot = self._last_has_robot
         
         info = FrameInfo(
             timestamp=timestamp,
@@ -152,9 +506,12 @@ class VideoRecorder:
     def record(self, frame):
         """录制帧"""
         if self.writer and self.is_recording:
-            self.writer.write(frame)
+            if self._writer_thread:
+                self._write_queue.put(frame)
+            else:
+                self._write(frame)
     
-    def annotate(self, frame, info: FrameInfo, overlay_text: str = "") -> frame:
+    def annotate(self, frame: np.ndarray, info: FrameInfo, overlay_text: str = "") -> np.ndarray:
         """标注帧"""
         # 绘制ROI
         x, y, w, h = info.roi
@@ -168,14 +525,21 @@ class VideoRecorder:
         if info.has_robot:
             cv2.circle(frame, (60, 30), 10, (0, 255, 0), -1)  # 绿色: 检测到机器人
         
-        # 时间戳
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        # 时间戳 (日期时间部分每秒格式化一次, 只拼接毫秒)
+        now = time.time()
+        second = int(now)
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        timestamp = f"{self._ts_prefix}.{int((now - second) * 1000):03d}"
         cv2.putText(frame, timestamp, (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
-        # 帧率
-        fps = info.frame_idx / info.timestamp if info.timestamp > 0 else 0
-        cv2.putText(frame, f"FPS: {fps:.1f}", (10, 70),
+        # 帧率 (每 10 帧更新一次)
+        if info.frame_idx % 10 == 1:
+            fps = info.frame_idx / info.timestamp if info.timestamp > 0 else 0
+            self._fps_text = f"FPS: {fps:.1f}"
+        cv2.putText(frame, self._fps_text, (10, 70),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
         
         # 额外文本
@@ -188,24 +552,27 @@ class VideoRecorder:
     def run_loop(self):
         """主循环"""
         while self.running:
-            ret, frame = self.cap.read()
+            self._frame_wanted.set()
+            frame = self._frame_queue.get()
             
-            if not ret:
+            if frame is None:
                 print("[ERROR] 读取帧失败")
                 break
             
             info, processed = self.process_frame(frame)
             annotated = self.annotate(processed, info)
             
-            # 显示
-            cv2.imshow('Robot Camera', annotated)
-            
             # 自动录制
             self.is_recording = True
             self.record(annotated)
             
+            # 显示 (按键只在刷新预览的帧上处理)
+            if self.frame_idx % self.preview_every:
+                continue
+            cv2.imshow('Robot Camera', annotated)
+            
             # 按键处理
-            key = cv2.waitKey(1) & 0xFF
+            key = _poll_key() & 0xFF
             if key == ord('q'):
                 break
             elif key == ord(' '):  # 空格暂停
@@ -216,48 +583,98 @@ class VideoRecorder:
         cv2.destroyAllWindows()
 
 
+def _track_step(xs, ys, ts, i, center_x, center_y, timestamp):
+    """
+    写入第 i 个轨迹点, 返回与上一点之间的 (路程, 速度)
+    
+    时间差不大于 0 时速度返回 -1。
+    """
+    xs[i] = center_x
+    ys[i] = center_y
+    ts[i] = timestamp
+    if i == 0:
+        return 0.0, -1.0
+    
+    dx = center_x - xs[i - 1]
+    dy = center_y - ys[i - 1]
+    dt = timestamp - ts[i - 1]
+    step = math.hypot(dx, dy)
+    if dt > 0:
+        return step, step / dt
+    return step, -1.0
+
+
+# 安装了 numba 时编译为本地代码, 否则按普通 Python 函数执行
+if njit is not None:
+    _track_step = njit(cache=True)(_track_step)
+
+
 class RobotTracker:
     """机器人追踪器"""
     
+    # 轨迹缓冲区初始容量, 写满后翻倍
+    INITIAL_CAPACITY = 4096
+    
     def __init__(self):
-        self.positions: List[Tuple[float, float, float]] = []  # (x, y, timestamp)
-        self.velocity_history: List[float] = []
+        # 位置按列存储 (x, y, timestamp), 有效长度为 self._count
+        self.xs = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self.ys = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self.ts = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._count = 0
+        
+        # 增量统计: 累计路程, 速度之和/最大值/样本数
+        self._dist_sum = 0.0
+        self._vel_sum = 0.0
+        self._vel_max = 0.0
+        self._vel_count = 0
+    
+    def _grow(self):
+        """缓冲区容量翻倍"""
+        capacity = len(self.xs) * 2
+        for name in ('xs', 'ys', 'ts'):
+            old = getattr(self, name)
+            buf = np.empty(capacity, dtype=old.dtype)
+            buf[:self._count] = old[:self._count]
+            setattr(self, name, buf)
     
     def update(self, roi: Tuple[int, int, int, int], timestamp: float):
         """更新位置"""
         x, y, w, h = roi
-        center_x = x + w // 2
-        center_y = y + h // 2
         
-        self.positions.append((center_x, center_y, timestamp))
+        if self._count == len(self.xs):
+            self._grow()
         
-        # 计算速度
-        if len(self.positions) >= 2:
-            prev = self.positions[-2]
-            dx = center_x - prev[0]
-            dy = center_y - prev[1]
-            dt = timestamp - prev[2]
-            if dt > 0:
-                velocity = np.sqrt(dx**2 + dy**2) / dt
-                self.velocity_history.append(velocity)
+        i = self._count
+        step, velocity = _track_step(
+            self.xs, self.ys, self.ts, i,
+            float(x + w // 2), float(y + h // 2), float(timestamp)
+        )
+        self._count = i + 1
+        
+        # 更新统计
+        self._dist_sum += step
+        if velocity >= 0:
+            self._vel_sum += velocity
+            self._vel_max = max(self._vel_max, velocity)
+            self._vel_count += 1
     
     def get_trajectory(self) -> np.ndarray:
         """获取轨迹"""
-        if len(self.positions) < 2:
+        if self._count < 2:
             return np.array([])
         
-        points = np.array([p[:2] for p in self.positions])
-        return points
+        n = self._count
+        return np.column_stack((self.xs[:n], self.ys[:n]))
     
     def get_stats(self) -> dict:
         """获取统计"""
-        if not self.velocity_history:
+        if not self._vel_count:
             return {'avg_velocity': 0, 'max_velocity': 0, 'distance': 0}
         
         return {
-            'avg_velocity': np.mean(self.velocity_history),
-            'max_velocity': np.max(self.velocity_history),
-            'distance': np.sum(self.velocity_history) / len(self.velocity_history),
+            'avg_velocity': self._vel_sum / self._vel_count,
+            'max_velocity': self._vel_max,
+            'distance': self._dist_sum,
         }
 
 
@@ -269,6 +686,10 @@ def main():
     parser.add_argument('--fps', type=int, default=30, help='帧率')
     parser.add_argument('--width', type=int, default=1280, help='宽度')
     parser.add_argument('--height', type=int, default=720, help='高度')
+    parser.add_argument('--preview-every', type=int, default=1,
+                        help='每 N 帧刷新一次预览 (默认: 每帧)')
+    parser.add_argument('--segment-time', type=int,
+                        help='按时长 (秒) 切分输出文件 (需要 ffmpeg)')
     args = parser.parse_args()
     
     # 生成输出文件名
@@ -285,7 +706,9 @@ def main():
     recorder = VideoRecorder(
         output_path=output,
         fps=args.fps,
-        resolution=(args.width, args.height)
+        resolution=(args.width, args.height),
+        preview_every=args.preview_every,
+        segment_time=args.segment_time
     )
     
     # 启动
@@ -17,16 +17,35 @@
 
 import cv2
 import numpy as np
+import os
 import time
 import argparse
 import json
 from datetime import datetime
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Union
 from enum import Enum
 import threading
 import queue
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+# 三个检测器并行运行, 限制每个 OpenCV 调用的线程数避免互相争抢
+cv2.setNumThreads(max(1, (os.cpu_count() or 1) // 3))
+
+# 颜色掩码形态学处理使用的核
+_MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+# 保留的检测历史条数 (60 FPS 下约 1 分钟)
+HISTORY_SIZE = 3600
 
 
 class ComponentType(Enum):
@@ -52,13 +71,97 @@ class DetectedComponent:
 @dataclass
 class InspectionResult:
     """检测结果"""
-    timestamp: str
+    timestamp_ns: int  # time.time_ns(), 需要字符串时用 iso
     components: List[DetectedComponent]
     wiring_ok: bool
     leds_ok: bool
     motors_ok: bool
     overall_status: str  # "OK", "WARNING", "ERROR"
     messages: List[str]
+    
+    @property
+    def iso(self) -> str:
+        """ISO 格式的时间戳 (只在输出时格式化)"""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat()
+
+
+@dataclass
+class FrameCaches:
+    """一帧图像及其颜色空间转换, 每帧只转换一次供所有检测器共用"""
+    bgr: np.ndarray
+    hsv: np.ndarray
+    gray: np.ndarray
+    
+    @classmethod
+    def from_bgr(cls, frame) -> "FrameCaches":
+        """由 BGR 图像 (ndarray 或 cv2.UMat) 生成, UMat 的转换在 OpenCL 设备上完成"""
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if isinstance(frame, cv2.UMat):
+            return cls(frame.get(), hsv.get(), gray.get())
+        return cls(frame, hsv, gray)
+    
+    @classmethod
+    def of(cls, frame: Union["FrameCaches", np.ndarray]) -> "FrameCaches":
+        """兼容直接传入 BGR 图像的调用方式"""
+        if isinstance(frame, cls):
+            return frame
+        return cls.from_bgr(frame)
+
+
+def _classify_hsv(hsv, tables, out):
+    """
+    逐像素查表得到颜色分类图
+    
+    tables[c][x] 为第 c 个通道取值 x 时满足的颜色位, 三个通道按位与即为
+    该像素同时满足的颜色, 开销与颜色数量无关。
+    """
+    th = tables[0]
+    ts = tables[1]
+    tv = tables[2]
+    rows, cols = out.shape
+    for r in prange(rows):
+        for c in range(cols):
+            out[r, c] = th[hsv[r, c, 0]] & ts[hsv[r, c, 1]] & tv[hsv[r, c, 2]]
+    return out
+
+
+def _roi_means(gray, boxes, out):
+    """
+    一次计算多个矩形区域的平均亮度
+    
+    boxes[i] = (x0, y0, x1, y1), 已裁剪到图像范围内; 空区域结果为 -1。
+    """
+    for i in prange(boxes.shape[0]):
+        x0, y0, x1, y1 = boxes[i, 0], boxes[i, 1], boxes[i, 2], boxes[i, 3]
+        n = (x1 - x0) * (y1 - y0)
+        if n <= 0:
+            out[i] = -1.0
+            continue
+        total = 0
+        for r in range(y0, y1):
+            for c in range(x0, x1):
+                total += gray[r, c]
+        out[i] = total / n
+    return out
+
+
+if njit is not None:
+    _classify_hsv = njit(parallel=True, nogil=True, cache=True, boundscheck=False)(_classify_hsv)
+    _roi_means = njit(parallel=True, nogil=True, cache=True, boundscheck=False)(_roi_means)
+    
+    # 导入时先编译 (有缓存时只是加载), 避免第一帧检测卡顿
+    _classify_hsv(np.zeros((8, 8, 3), np.uint8), np.zeros((3, 256), np.uint8),
+                  np.empty((8, 8), np.uint8))
+    _roi_means(np.zeros((8, 8), np.uint8), np.zeros((1, 4), np.int32),
+               np.empty(1, np.float32))
+
+# numba 的 workqueue 线程层不支持多个线程同时调用并行内核, 此时检测器顺序运行
+if njit is not None:
+    from numba import threading_layer
+    _PARALLEL_DETECT = threading_layer() != 'workqueue'
+else:
+    _PARALLEL_DETECT = True
 
 
 class ColorDetector:
@@ -75,29 +178,109 @@ class ColorDetector:
         'black': ([0, 0, 0], [180, 255, 30]),
     }
     
+    # inRange 使用的上下限数组 {颜色名: (lower, upper)}
+    HSV_BOUNDS = {
+        name: (np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+        for name, (lower, upper) in COLOR_RANGES.items()
+    }
+    
+    # 颜色分类图中每种颜色占一位 (颜色范围可能重叠, 因此不用单一标签)
+    COLOR_BITS = {name: 1 << i for i, name in enumerate(COLOR_RANGES)}
+    
+    # 裁剪区域的外扩边距, 保证形态学处理结果与整幅图一致
+    CROP_MARGIN = 5
+    
+    # 只做开运算去除噪点; 设为 False 时再做一次闭运算填补空洞 (用于对比)
+    OPEN_ONLY = True
+    # 轮廓面积下限 (不做闭运算时碎片更多, 阈值相应提高)
+    MIN_AREA = 150
+    
+    # channel_tables 的缓存 {颜色名元组: 查找表}
+    _tables: Dict[Tuple[str, ...], np.ndarray] = {}
+    
+    @classmethod
+    def channel_tables(cls, color_names: Tuple[str, ...]) -> np.ndarray:
+        """按通道的颜色位查找表, 形状 (3, 256)"""
+        tables = cls._tables.get(color_names)
+        if tables is None:
+            values = np.arange(256)
+            tables = np.zeros((3, 256), dtype=np.uint8)
+            for name in color_names:
+                lower, upper = cls.COLOR_RANGES[name]
+                for c in range(3):
+                    tables[c, (values >= lower[c]) & (values <= upper[c])] |= cls.COLOR_BITS[name]
+            cls._tables[color_names] = tables
+        return tables
+    
+    @classmethod
+    def classify(cls, hsv: np.ndarray, color_names: List[str]) -> np.ndarray:
+        """一次遍历得到颜色分类图, 第 k 位表示是否属于 COLOR_BITS 中对应的颜色"""
+        names = tuple(n for n in color_names if n in cls.COLOR_RANGES)
+        
+        if njit is not None:
+            out = np.empty(hsv.shape[:2], dtype=np.uint8)
+            return _classify_hsv(hsv, cls.channel_tables(names), out)
+        
+        # 未安装 numba: 逐个颜色 inRange 后按位合并
+        out = np.zeros(hsv.shape[:2], dtype=np.uint8)
+        for name in names:
+            mask = cv2.inRange(hsv, *cls.HSV_BOUNDS[name])
+            cv2.bitwise_or(out, cls.COLOR_BITS[name], dst=out, mask=mask)
+        return out
+    
+    @classmethod
+    def detect_colors(cls, hsv: np.ndarray, color_names: List[str]) -> Dict[str, List[Tuple[int, int, int]]]:
+        """一次分类检测多种颜色的轮廓"""
+        names = [name for name in color_names if name in cls.COLOR_RANGES]
+        
+        if njit is None:
+            # 没有 numba 时分类图并不比逐个 inRange 快, 直接逐个检测
+            return {name: cls.detect_color(hsv, name) for name in names}
+        
+        labels = cls.classify(hsv, names)
+        return {
+            name: cls._find_regions(cv2.bitwise_and(labels, cls.COLOR_BITS[name]))
+            for name in names
+        }
+    
     @classmethod
     def detect_color(cls, hsv: np.ndarray, color_name: str) -> List[Tuple[int, int, int]]:
         """检测指定颜色的轮廓"""
-        ranges = cls.COLOR_RANGES.get(color_name, [])
-        if not ranges:
+        bounds = cls.HSV_BOUNDS.get(color_name)
+        if bounds is None:
+            return []
+        
+        mask = cv2.inRange(hsv, *bounds)
+        return cls._find_regions(mask)
+    
+    @classmethod
+    def _find_regions(cls, mask: np.ndarray) -> List[Tuple[int, int, int]]:
+        """在掩码的非零区域内做形态学处理并提取轮廓"""
+        # 像素太少不可能形成足够大的区域 (开运算只会去掉像素), 跳过后续处理
+        if cv2.countNonZero(mask) <= cls.MIN_AREA:
             return []
         
-        lower = np.array(ranges[0], dtype=np.uint8)
-        upper = np.array(ranges[1], dtype=np.uint8)
+        x, y, w, h = cv2.boundingRect(mask)
+        if w == 0 or h == 0:
+            return []
         
-        mask = cv2.inRange(hsv, lower, upper)
+        # 只处理包含该颜色的区域
+        m = cls.CROP_MARGIN
+        x0, y0 = max(x - m, 0), max(y - m, 0)
+        mask = mask[y0:y + h + m, x0:x + w + m]
         
         # 形态学处理
-        kernel = np.ones((5, 5), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, _MORPH_KERNEL)
+        if not cls.OPEN_ONLY:
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, _MORPH_KERNEL)
         
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(x0, y0))
         
         results = []
         for contour in contours:
             area = cv2.contourArea(contour)
-            if area > 100:  # 忽略太小的区域
+            if area > cls.MIN_AREA:  # 忽略太小的区域
                 x, y, w, h = cv2.boundingRect(contour)
                 center = (int(x + w/2), int(y + h/2))
                 results.append((center, area))
@@ -108,31 +291,53 @@ class ColorDetector:
 class LEDDetector:
     """LED 状态检测器"""
     
-    def __init__(self):
+    # 红色 LED 的 BGR 范围 (R 高, G/B 低), 直接在 BGR 上判断, 不需要转 HSV
+    RED_BGR_LOWER = np.array([0, 0, 100], dtype=np.uint8)
+    RED_BGR_UPPER = np.array([80, 80, 255], dtype=np.uint8)
+    
+    def __init__(self, history_size: int = HISTORY_SIZE):
         self.led_states = {}  # {led_id: "on"/"off"}
-        self.history = []
+        self.history = deque(maxlen=history_size)
+    
+    def find_red_bgr(self, frame: np.ndarray) -> List[Tuple[int, int, int]]:
+        """在 BGR 图像上检测红色区域 (覆盖 HSV 中 red 和 red2 两段色相)"""
+        mask = cv2.inRange(frame, self.RED_BGR_LOWER, self.RED_BGR_UPPER)
+        return ColorDetector._find_regions(mask)
     
-    def detect(self, frame: np.ndarray) -> List[DetectedComponent]:
+    @staticmethod
+    def _brightness(gray: np.ndarray, leds: List[Tuple[int, int, int]]) -> np.ndarray:
+        """每个 LED 中心 30x30 区域的平均亮度, 区域落在图像外时为 -1"""
+        rows, cols = gray.shape
+        boxes = np.array([(max(cx - 15, 0), max(cy - 15, 0),
+                           min(cx + 15, cols), min(cy + 15, rows))
+                          for (cx, cy), _ in leds], dtype=np.int32).reshape(-1, 4)
+        out = np.empty(len(boxes), dtype=np.float32)
+        
+        if njit is not None:
+            return _roi_means(gray, boxes, out)
+        
+        for i, (x0, y0, x1, y1) in enumerate(boxes):
+            out[i] = cv2.mean(gray[y0:y1, x0:x1])[0] if x1 > x0 and y1 > y0 else -1
+        return out
+    
+    def detect(self, frame: Union[FrameCaches, np.ndarray]) -> List[DetectedComponent]:
         """检测 LED 状态"""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
+        caches = FrameCaches.of(frame)
         detected = []
         
         # 检测红色 LED (亮/灭)
-        red_contours = ColorDetector.detect_color(hsv, 'red')
-        red_contours2 = ColorDetector.detect_color(hsv, 'red2')
-        all_red = red_contours + red_contours2
+        all_red = self.find_red_bgr(caches.bgr)[:5]  # 最多5个LED
         
-        for center, area in all_red[:5]:  # 最多5个LED
+        # 检测亮度来判断开关
+        brightness = self._brightness(caches.gray, all_red)
+        
+        for (center, area), value in zip(all_red, brightness):
             x = center[0] - 15
             y = center[1] - 15
             w, h = 30, 30
             
-            # 检测亮度来判断开关
-            roi = frame[max(0,y):y+h, max(0,x):x+w]
-            if roi.size > 0:
-                brightness = cv2.mean(roi)[0]
-                state = "on" if brightness > 100 else "off"
+            if value >= 0:
+                state = "on" if value > 100 else "off"
                 
                 detected.append(DetectedComponent(
                     type=ComponentType.LED,
@@ -149,28 +354,36 @@ class LEDDetector:
 class MotorDetector:
     """电机状态检测器"""
     
-    def __init__(self):
-        self.prev_frame = None
-        self.motion_history = []
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.motion_history = deque(maxlen=history_size)
+        
+        # 两个灰度缓冲区轮流使用: _gray[_idx] 写入本帧, 另一个保存上一帧
+        self._gray = [None, None]
+        self._idx = 0
+        self._frames = 0  # 已处理帧数, 第一帧没有可比较的上一帧
+        self._diff_buf = None
     
-    def detect(self, frame: np.ndarray) -> List[DetectedComponent]:
+    def detect(self, frame: Union[FrameCaches, np.ndarray]) -> List[DetectedComponent]:
         """检测电机转动"""
+        caches = FrameCaches.of(frame)
         detected = []
         
-        if self.prev_frame is None:
-            self.prev_frame = frame.copy()
-            return detected
-        
-        # 计算差异
-        gray1 = cv2.cvtColor(self.prev_frame, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # 共用的灰度图模糊到自己的缓冲区 (均值滤波与核大小无关, 用于运动检测效果与高斯模糊相当)
+        idx = self._idx
+        cur = cv2.boxFilter(caches.gray, -1, (21, 21), dst=self._gray[idx])
+        self._gray[idx] = cur
+        self._idx = 1 - idx
         
-        gray1 = cv2.GaussianBlur(gray1, (21, 21), 0)
-        gray2 = cv2.GaussianBlur(gray2, (21, 21), 0)
+        prev = self._gray[1 - idx]
+        self._frames += 1
+        if self._frames == 1 or prev.shape != cur.shape:
+            return detected
         
-        diff = cv2.absdiff(gray1, gray2)
-        thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)[1]
-        thresh = cv2.dilate(thresh, None, iterations=2)
+        # 计算差异 (差分/二值化/膨胀都在同一个缓冲区内完成)
+        thresh = cv2.absdiff(prev, cur, dst=self._diff_buf)
+        self._diff_buf = thresh
+        cv2.threshold(thresh, 25, 255, cv2.THRESH_BINARY, dst=thresh)
+        cv2.dilate(thresh, None, dst=thresh, iterations=2)
         
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
@@ -196,7 +409,6 @@ class MotorDetector:
                     label=f"Motor-{state}"
                 ))
         
-        self.prev_frame = frame.copy()
         return detected
 
 
@@ -207,9 +419,9 @@ class WiringInspector:
         self.wire_segments = []
         self.connected_components = {}
     
-    def detect(self, frame: np.ndarray) -> Dict:
+    def detect(self, frame: Union[FrameCaches, np.ndarray]) -> Dict:
         """检测连线状态"""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hsv = FrameCaches.of(frame).hsv
         
         # 检测不同颜色的线
         colors = {
@@ -223,9 +435,10 @@ class WiringInspector:
         
         detected_wires = {}
         
-        for color_name, bgr in colors.items():
-            contours = ColorDetector.detect_color(hsv, color_name)
-            
+        # 一次分类得到全部颜色
+        color_contours = ColorDetector.detect_colors(hsv, list(colors))
+        
+        for color_name, contours in color_contours.items():
             for center, area in contours:
                 if color_name not in detected_wires:
                     detected_wires[color_name] = []
@@ -246,21 +459,23 @@ class WiringInspector:
         
         return status
     
-    def check_connections(self, frame: np.ndarray) -> Tuple[bool, List[str]]:
+    def check_connections(self, frame: Union[FrameCaches, np.ndarray]) -> Tuple[bool, List[str]]:
         """检查关键连接"""
         messages = []
         wiring_ok = True
         
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hsv = FrameCaches.of(frame).hsv
+        
+        wires = ColorDetector.detect_colors(hsv, ['red', 'black'])
         
         # 检查红色 (VCC) 线路
-        red_wires = ColorDetector.detect_color(hsv, 'red')
+        red_wires = wires['red']
         if len(red_wires) < 2:
             messages.append("⚠️ 检测到较少的红色电源线")
             wiring_ok = False
         
         # 检查黑色 (GND) 线路
-        black_wires = ColorDetector.detect_color(hsv, 'black')
+        black_wires = wires['black']
         if len(black_wires) < 2:
             messages.append("⚠️ 检测到较少的地线")
             wiring_ok = False
@@ -273,27 +488,88 @@ class WiringInspector:
         return wiring_ok, messages
 
 
+class LatestSlot:
+    """只保存最新值的单槽容器: 新值覆盖旧值, 读取时取走"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._val = None
+    
+    def set(self, value):
+        """写入新值 (覆盖未被读取的旧值)"""
+        with self._cond:
+            self._val = value
+            self._cond.notify_all()
+    
+    def get(self, timeout: Optional[float] = None):
+        """等待并取走最新值, 超时返回 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._val is not None, timeout):
+                return None
+            value, self._val = self._val, None
+            return value
+
+
 class VisionInspector:
     """综合视觉检测器"""
     
-    def __init__(self, camera_id: int = 0):
+    # 保留的检测历史条数
+    HISTORY_SIZE = HISTORY_SIZE
+    
+    # 检测帧率; OpenClaw 模式下超过 IDLE_TIMEOUT 秒没有 get_result() 时降到 IDLE_FPS
+    TARGET_FPS = 30
+    IDLE_FPS = 2
+    IDLE_TIMEOUT = 1.0
+    
+    # 连线检测间隔 (秒): 连线不会逐帧变化, 其间复用上次结果
+    WIRING_INTERVAL = 0.5
+    
+    # 检测使用的分辨率 (宽, 高)
+    PROCESS_SIZE = (640, 360)
+    
+    def __init__(self, camera_id: int = 0, use_opencl: bool = False,
+                 capture_res: Optional[Tuple[int, int]] = None):
         self.camera_id = camera_id
         self.cap = None
+        # 默认直接按检测分辨率采集; 需要大图显示时可指定更高的采集分辨率
+        self.capture_res = capture_res or self.PROCESS_SIZE
+        
+        # OpenCL (T-API): 整帧操作走 cv2.UMat, 没有可用设备时退回 CPU
+        self.use_opencl = use_opencl and cv2.ocl.haveOpenCL()
+        if use_opencl and not self.use_opencl:
+            print("[WARN] OpenCL 不可用, 使用 CPU 处理")
         
-        self.led_detector = LEDDetector()
-        self.motor_detector = MotorDetector()
+        self.led_detector = LEDDetector(self.HISTORY_SIZE)
+        self.motor_detector = MotorDetector(self.HISTORY_SIZE)
         self.wiring_inspector = WiringInspector()
         
         self.running = False
         self.frame_queue = queue.Queue(maxsize=2)
-        self.result_queue = queue.Queue(maxsize=2)
-        
-        # 检测历史
-        self.history: List[InspectionResult] = []
+        self.result_slot = LatestSlot()  # 只保留最新的检测结果
+        self._frame_wanted = threading.Event()  # 检测线程已准备好处理下一帧
+        self._grab_thread = None
+        self.detect_thread = None
+        self._pool = None  # 并行运行检测器的线程池 (start 时创建)
+        self._openclaw_mode = False
+        self._last_consumed_ts = time.monotonic()  # 最近一次 get_result() 的时间
+        self._wiring = None  # 最近一次 _inspect_wiring() 的结果
+        self._wiring_ts = float('-inf')
+        
+        # 检测历史 (只保留最近 HISTORY_SIZE 条, 统计按状态累计全部检测)
+        self.history: deque = deque(maxlen=self.HISTORY_SIZE)
+        self._status_counts: Counter = Counter()
         
         # OpenClaw 反馈
         self.last_status = "UNKNOWN"
         self.last_messages = []
+        # get_status_for_openclaw 的缓存: (对应的检测结果, 状态字典)
+        self._openclaw_status: Tuple[Optional[InspectionResult], Dict] = (None, {
+            "status": "UNKNOWN",
+            "messages": ["等待检测..."],
+            "components": 0,
+            "wiring_ok": False
+        })
     
     def start(self):
         """启动检测"""
@@ -303,12 +579,23 @@ class VisionInspector:
             raise RuntimeError(f"无法打开摄像头: {self.camera_id}")
         
         # 设置分辨率
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        width, height = self.capture_res
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # 驱动只保留最新一帧 (V4L2/AVFoundation 支持, 其他后端忽略)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
         
         self.running = True
         
-        # 启动检测线程
+        if _PARALLEL_DETECT:
+            self._pool = ThreadPoolExecutor(max_workers=3)
+        
+        # 启动采集线程和检测线程
+        self._grab_thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._grab_thread.start()
         self.detect_thread = threading.Thread(target=self._detect_loop, daemon=True)
         self.detect_thread.start()
         
@@ -318,28 +605,104 @@ class VisionInspector:
         """停止检测"""
         self.running = False
         
+        # 等采集线程退出后再释放摄像头
+        if self._grab_thread:
+            self._grab_thread.join()
+            self._grab_thread = None
+        
+        # 检测线程收到结束标记后退出, 之后才能关闭线程池
+        if self.detect_thread:
+            self.detect_thread.join()
+            self.detect_thread = None
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+        
         if self.cap:
             self.cap.release()
         
         print("[INFO] 视觉检测已停止")
     
+    def _grab_loop(self):
+        """
+        采集循环: 持续 grab() 清空驱动缓冲, 只在检测线程需要时 retrieve() 解码
+        
+        检测跟不上时旧帧直接被丢弃而不解码, 检测线程拿到的总是最新一帧。
+        """
+        while self.running:
+            if not self.cap.grab():
+                print("[ERROR] 无法读取帧")
+                break
+            if self._frame_wanted.is_set():
+                self._frame_wanted.clear()
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    print("[ERROR] 无法读取帧")
+                    break
+                self.frame_queue.put(frame)
+        
+        # 通知检测线程采集结束
+        self.frame_queue.put(None)
+    
+    def _frame_interval(self) -> float:
+        """当前的检测间隔: 无人读取结果时 OpenClaw 模式降频"""
+        idle = (self._openclaw_mode and
+                time.monotonic() - self._last_consumed_ts > self.IDLE_TIMEOUT)
+        return 1.0 / (self.IDLE_FPS if idle else self.TARGET_FPS)
+    
+    def _inspect_wiring(self, caches: FrameCaches) -> Tuple[Dict, Tuple[bool, List[str]]]:
+        """连线检测和关键连接检查"""
+        return (self.wiring_inspector.detect(caches),
+                self.wiring_inspector.check_connections(caches))
+    
     def _detect_loop(self):
         """检测循环"""
+        next_ts = time.monotonic()
         while self.running:
-            ret, frame = self.cap.read()
+            # 按帧率调度, 等待期间采集线程继续丢弃旧帧
+            delay = next_ts - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
             
-            if not ret:
-                print("[ERROR] 无法读取帧")
+            self._frame_wanted.set()
+            frame = self.frame_queue.get()
+            
+            if frame is None:
                 break
             
-            # 缩小处理
-            small_frame = cv2.resize(frame, (640, 360))
+            # 缩放和颜色转换在 GPU 上完成, 检测器需要切片/轮廓, 结果取回 numpy
+            small_frame = cv2.UMat(frame) if self.use_opencl else frame
+            
+            # 采集分辨率与检测分辨率不同 (或摄像头不支持) 时才缩放, 原帧留给显示
+            if frame.shape[1::-1] != self.PROCESS_SIZE:
+                small_frame = cv2.resize(small_frame, self.PROCESS_SIZE)
             
-            # 并行检测
-            leds = self.led_detector.detect(small_frame)
-            motors = self.motor_detector.detect(small_frame)
-            wiring_status = self.wiring_inspector.detect(small_frame)
-            wiring_ok, wiring_msgs = self.wiring_inspector.check_connections(small_frame)
+            # HSV/灰度每帧只转换一次
+            caches = FrameCaches.from_bgr(small_frame)
+            
+            # 连线检测按 WIRING_INTERVAL 降频
+            now = time.monotonic()
+            run_wiring = now - self._wiring_ts >= self.WIRING_INTERVAL
+            if run_wiring:
+                self._wiring_ts = now
+            
+            # 并行检测 (各检测器互不依赖, OpenCV/numba 运算期间释放 GIL)
+            if self._pool is not None:
+                led_future = self._pool.submit(self.led_detector.detect, caches)
+                motor_future = self._pool.submit(self.motor_detector.detect, caches)
+                if run_wiring:
+                    wiring_future = self._pool.submit(self._inspect_wiring, caches)
+                leds = led_future.result()
+                motors = motor_future.result()
+                if run_wiring:
+                    self._wiring = wiring_future.result()
+            else:
+                leds = self.led_detector.detect(caches)
+                motors = self.motor_detector.detect(caches)
+                if run_wiring:
+                    self._wiring = self._inspect_wiring(caches)
+            
+            wiring_status, (wiring_ok, wiring_msgs) = self._wiring
             
             # 综合结果
             components = leds + motors
@@ -357,7 +720,7 @@ class VisionInspector:
                 status = "WARNING"
             
             result = InspectionResult(
-                timestamp=datetime.now().isoformat(),
+                timestamp_ns=time.time_ns(),
                 components=components,
                 wiring_ok=wiring_ok,
                 leds_ok=leds_ok,
@@ -367,43 +730,46 @@ class VisionInspector:
             )
             
             self.history.append(result)
+            self._status_counts[status] += 1
             self.last_status = status
             self.last_messages = wiring_msgs
             
-            # 放入队列
-            if not self.result_queue.full():
-                self.result_queue.put((frame, result))
+            # 覆盖旧结果, 使用方拿到的总是最新一帧
+            self.result_slot.set((frame, result))
             
-            time.sleep(0.03)  # ~30 FPS
+            # 处理超时时不累积欠账, 直接处理下一帧
+            next_ts = max(next_ts + self._frame_interval(), time.monotonic())
     
     def get_result(self, timeout: float = 1.0) -> Tuple[np.ndarray, InspectionResult]:
         """获取检测结果"""
-        try:
-            return self.result_queue.get(timeout=timeout)
-        except queue.Empty:
+        self._last_consumed_ts = time.monotonic()
+        latest = self.result_slot.get(timeout=timeout)
+        if latest is None:
             return None, None
+        return latest
     
     def get_status_for_openclaw(self) -> Dict:
-        """获取适合 OpenClaw 读取的状态"""
-        if not self.history:
-            return {
-                "status": "UNKNOWN",
-                "messages": ["等待检测..."],
-                "components": 0,
-                "wiring_ok": False
-            }
+        """
+        获取适合 OpenClaw 读取的状态
         
-        latest = self.history[-1]
+        每次检测结果只生成一次字典 (各调用方共享, 不要修改)。
+        """
+        cached_result, status = self._openclaw_status
+        latest = self.history[-1] if self.history else None
+        if latest is cached_result:
+            return status
         
-        return {
+        status = {
             "status": latest.overall_status,
             "messages": latest.messages,
             "components_found": len(latest.components),
             "leds_ok": latest.leds_ok,
             "motors_ok": latest.motors_ok,
             "wiring_ok": latest.wiring_ok,
-            "timestamp": latest.timestamp
+            "timestamp": latest.iso
         }
+        self._openclaw_status = (latest, status)
+        return status
     
     def draw_result(self, frame: np.ndarray, result: InspectionResult) -> np.ndarray:
         """绘制检测结果"""
@@ -440,7 +806,8 @@ class VisionInspector:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
         
         # 时间戳
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        now = time.time()
+        timestamp = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}.{int(now % 1 * 1000):03d}"
         cv2.putText(frame, timestamp, (frame.shape[1]-250, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
@@ -495,6 +862,7 @@ class VisionInspector:
         print("="*60 + "\n")
         
         last_output = time.time()
+        self._openclaw_mode = True
         
         while self.running:
             status = self.get_status_for_openclaw()
@@ -526,10 +894,10 @@ class VisionInspector:
         
         report = {
             "timestamp": datetime.now().isoformat(),
-            "total_checks": len(self.history),
-            "ok_count": sum(1 for r in self.history if r.overall_status == "OK"),
-            "warning_count": sum(1 for r in self.history if r.overall_status == "WARNING"),
-            "error_count": sum(1 for r in self.history if r.overall_status == "ERROR"),
+            "total_checks": sum(self._status_counts.values()),
+            "ok_count": self._status_counts["OK"],
+            "warning_count": self._status_counts["WARNING"],
+            "error_count": self._status_counts["ERROR"],
             "latest_status": self.last_status,
             "messages": self.last_messages
         }
@@ -543,6 +911,15 @@ class VisionInspector:
 
 # ============ 主程序 ============
 
+def _parse_resolution(value: str) -> Tuple[int, int]:
+    """解析 "宽x高" 形式的分辨率"""
+    try:
+        width, height = (int(v) for v in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的分辨率: {value} (示例: 1280x720)")
+    return width, height
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="硬件视觉检测器",
@@ -574,10 +951,16 @@ OpenClaw 集成:
                        help='重点检查连线')
     parser.add_argument('--save-report', action='store_true',
                        help='保存检测报告')
+    parser.add_argument('--use-opencl', action='store_true',
+                       help='使用 OpenCL (cv2.UMat) 加速整帧处理')
+    parser.add_argument('--capture-res', type=_parse_resolution, default=None,
+                       help='采集分辨率, 如 1280x720 (默认与检测分辨率 640x360 相同)')
     args = parser.parse_args()
     
     try:
-        inspector = VisionInspector(camera_id=args.camera)
+        inspector = VisionInspector(camera_id=args.camera,
+                                    use_opencl=args.use_opencl,
+                                    capture_res=args.capture_res)
         inspector.start()
         
         if args.openclaw_mode:
@@ -19,6 +19,7 @@ OpenClaw 视觉集成模块
 import sys
 import time
 import json
+from collections import deque
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass
 
@@ -39,6 +40,9 @@ class HardwareStatus:
 class OpenClawVision:
     """OpenClaw 视觉集成"""
     
+    # 保留的状态历史条数
+    STATUS_HISTORY_SIZE = 3600
+    
     def __init__(self, camera_id: int = 0):
         self.camera_id = camera_id
         self.inspector = None
@@ -46,7 +50,11 @@ class OpenClawVision:
         
         # 状态
         self.last_status = None
-        self.status_history = []
+        self._last_check_ts = 0.0  # last_status 的生成时间 (time.monotonic)
+        self.status_history = deque(maxlen=self.STATUS_HISTORY_SIZE)
+        # 全部检查的累计次数 (不受历史长度限制)
+        self._check_count = 0
+        self._ok_count = 0
         
         # 阈值
         self.motor_threshold = 0.5  # 电机检测阈值
@@ -115,26 +123,42 @@ class OpenClawVision:
         )
         
         self.last_status = result
+        self._last_check_ts = time.monotonic()
         self.status_history.append(result)
+        self._check_count += 1
+        if all_ok:
+            self._ok_count += 1
         
         return result
     
+    def check_cached(self, max_age: float = 0.05) -> HardwareStatus:
+        """
+        获取硬件状态, 上次检查不超过 max_age 秒时直接复用
+        
+        同一时刻需要多项状态时应调用一次 check() 并读取各字段。
+        """
+        if (self.last_status is not None and self.running and
+                time.monotonic() - self._last_check_ts <= max_age):
+            return self.last_status
+        return self.check()
+    
+    # 以下为便捷封装, 短时间内连续调用共用同一次检查
+    
     def is_all_ok(self) -> bool:
         """所有检查是否通过"""
-        status = self.check()
-        return status.overall_ok
+        return self.check_cached().overall_ok
     
     def is_wiring_ok(self) -> bool:
         """连线是否正常"""
-        return self.check().wiring_ok
+        return self.check_cached().wiring_ok
     
     def is_motors_ok(self) -> bool:
         """电机是否正常"""
-        return self.check().motors_ok
+        return self.check_cached().motors_ok
     
     def is_leds_ok(self) -> bool:
         """LED 是否正常"""
-        return self.check().leds_ok
+        return self.check_cached().leds_ok
     
     def get_status_message(self) -> str:
         """获取状态消息"""
@@ -178,8 +202,8 @@ class OpenClawVision:
         if self.last_status:
             return {
                 'status': self.last_status,
-                'check_count': len(self.status_history),
-                'ok_rate': sum(1 for s in self.status_history if s.overall_ok) / len(self.status_history) if self.status_history else 0
+                'check_count': self._check_count,
+                'ok_rate': self._ok_count / self._check_count if self._check_count else 0
             }
         return {'error': '无检测数据'}
     
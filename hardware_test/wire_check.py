@@ -12,18 +12,31 @@
 使用:
     python wire_check.py --port COM3
     python wire_check.py --port COM3 --verbose
+
+连线图保存在同目录的 wiring_diagram.txt。
 """
 
-import serial
+import functools
+import os
+import re
+import sys
 import time
-import argparse
-import json
 from datetime import datetime
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# serial / json / argparse 在用到时才导入, 只看连线图 (--diagram) 时不加载
+if TYPE_CHECKING:
+    import serial
+
 
 class CheckResult(Enum):
     """检测结果"""
@@ -34,7 +47,7 @@ class CheckResult(Enum):
     UNKNOWN = "❓ UNKNOWN"
 
 
-@dataclass
+@dataclass(slots=True)
 class WireCheck:
     """连线检测项"""
     name: str
@@ -43,9 +56,10 @@ class WireCheck:
     expected: str
     result: CheckResult = CheckResult.UNKNOWN
     message: str = ""
+    fix_key: str = ""  # 对应 _FIX_MAP 中的修复建议
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PinDefinition:
     """引脚定义"""
     name: str
@@ -56,7 +70,8 @@ class PinDefinition:
 
 
 # ============ 引脚定义 ============
-PIN_DEFINITIONS = {
+# 只读映射, 防止被调用方修改
+PIN_DEFINITIONS = MappingProxyType({
     # UART 连接 (STM32 ↔ ESP32)
     'uart_stm32_tx': PinDefinition(
         name="STM32 TX → ESP32 RX",
@@ -157,429 +172,94 @@ PIN_DEFINITIONS = {
         function="电池供电",
         voltage=3.7  # 3.7V LiPo
     ),
-}
+})
 
 
 # ============ 连线图 ============
-WIRING_DIAGRAM = """
-╔═══════════════════════════════════════════════════════════════════════════════╗
-║                          硬件连线图 (俯视图)                                 ║
-╠═══════════════════════════════════════════════════════════════════════════════╣
-║                                                                               ║
-║    ┌─────────────────┐          ┌─────────────────┐                          ║
-║    │    STM32F4      │          │     ESP32       │                          ║
-║    │                 │          │                 │                          ║
-║    │  PA2 ──────────┼──────────┤ GPIO 17 (RX)   │                          ║
-║    │  PA3 ──────────┼──────────┤ GPIO 16 (TX)   │                          ║
-║    │                 │          │                 │                          ║
-║    │  PD4 ──────────┼──────────┤ GPIO 0 (BOOT)  │                          ║
-║    │  PD5 ──────────┼──────────┤ EN   (RST)     │                          ║
-║    │                 │          │                 │                          ║
-║    │  PB6 ──────────┼──────────┤ (空)            │                          ║
-║    │  PB7 ──────────┼──────────┤ (空)            │                          ║
-║    │                 │          │                 │                          ║
-║    │  PE0 ─────┐    │          │                 │                          ║
-║    │  PE1 ─────┼────┼──────────┤                 │                          ║
-║    │  PE2 ─────┼────┤          │                 │                          ║
-║    │  PE3 ─────┘    │          │                 │                          ║
-║    │                 │          │                 │                          ║
-║    │  3.3V ─────────┼──────────┤ 3.3V           │                          ║
-║    │  GND  ─────────┼──────────┤ GND            │                          ║
-║    │                 │          │                 │                          ║
-║    └────────┬────────┘          └────────┬────────┘                          ║
-║             │                            │                                   ║
-║    ┌────────┴────────┐          ┌────────┴────────┐                          ║
-║    │   DRV8833      │          │    MPU6050      │                          ║
-║    │                 │          │                 │                          ║
-║    │  VMOT ─────────┴── BATTERY                 │                          ║
-║    │  GND  ─────────┴── GND                    │                          ║
-║    │                 │          │                 │                          ║
-║    │  AIN1 ← PE0    │          │  VCC ── 3.3V   │                          ║
-║    │  AIN2 ← PE1    │          │  GND ── GND    │                          ║
-║    │  BIN1 ← PE2    │          │  SCL ← PB6     │                          ║
-║    │  BIN2 ← PE3    │          │  SDA ← PB7     │                          ║
-║    │                 │          │                 │                          ║
-║    │  AOUT1 → 左电机│          │  AD0 ── GND     │                          ║
-║    │  AOUT2 → 左电机│          │                 │                          ║
-║    │  BOUT1 → 右电机│          │                 │                          ║
-║    │  BOUT2 → 右电机│          │                 │                          ║
-║    └─────────────────┘          └─────────────────┘                          ║
-║                                                                               ║
-╚═══════════════════════════════════════════════════════════════════════════════╝
-
-颜色约定:
-  红色   = VCC (3.3V / VBAT)
-  黑色   = GND
-  白色/黄色 = TX/RX (UART)
-  蓝色   = I2C (SCL/SDA)
-  绿色/橙色 = PWM (电机)
-"""
+# 连线图保存在同目录的 wiring_diagram.txt, 首次使用时加载
+_WIRING_DIAGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "wiring_diagram.txt")
 
 
-# ============ 连线检测器 ============
-class WireChecker:
-    """硬件连线检测器"""
-    
-    def __init__(self, port: str, baud: int = 115200):
-        self.port = port
-        self.baud = baud
-        self.checks: List[WireCheck] = []
-        self.stm32_connected = False
-        self.esp32_connected = False
-    
-    def run_all_checks(self, verbose: bool = False) -> Dict:
-        """运行所有检测"""
-        results = {
-            'timestamp': datetime.now().isoformat(),
-            'port': self.port,
-            'checks': [],
-            'summary': {'pass': 0, 'fail': 0, 'warning': 0, 'skip': 0}
-        }
-        
-        print(f"\n{'='*60}")
-        print("  🔌 硬件连线检测器 v1.0")
-        print(f"{'='*60}\n")
-        
-        # 1. 检测串口连接
-        self._check_serial_connection(verbose)
-        
-        # 2. 检测STM32通信
-        self._check_stm32_connection(verbose)
-        
-        # 3. 检测ESP32通信
-        self._check_esp32_connection(verbose)
-        
-        # 4. 检测IMU
-        self._check_imu(verbose)
-        
-        # 5. 检测电机驱动
-        self._check_motor_driver(verbose)
-        
-        # 6. 检测电源
-        self._check_power(verbose)
-        
-        # 7. 检测UART连接
-        self._check_uart_loopback(verbose)
-        
-        # 打印结果
-        print(f"\n{'='*60}")
-        print("  检测结果")
-        print(f"{'='*60}\n")
-        
-        for check in self.checks:
-            icon = check.result.value
-            print(f"{icon} {check.name}: {check.message}")
-            results['checks'].append({
-                'name': check.name,
-                'result': check.result.value,
-                'message': check.message
-            })
-            results['summary'][self._get_result_type(check.result)] += 1
-        
-        # 打印总结
-        print(f"\n{'='*60}")
-        print(f"  总结: {results['summary']['pass']} 通过, "
-              f"{results['summary']['fail']} 失败, "
-              f"{results['summary']['warning']} 警告")
-        print(f"{'='*60}")
-        
-        return results
-    
-    def _get_result_type(self, result: CheckResult) -> str:
-        """获取结果类型"""
-        if result == CheckResult.PASS:
-            return 'pass'
-        elif result == CheckResult.FAIL:
-            return 'fail'
-        elif result == CheckResult.WARNING:
-            return 'warning'
-        else:
-            return 'skip'
-    
-    def _add_check(self, name: str, desc: str, func: str, 
-                   expected: str, result: CheckResult, msg: str):
-        """添加检测项"""
-        self.checks.append(WireCheck(
-            name=name, description=desc,
-            check_func=func, expected=expected,
-            result=result, message=msg
-        ))
-    
-    def _check_serial_connection(self, verbose: bool):
-        """检测串口连接"""
-        try:
-            with serial.Serial(self.port, self.baud, timeout=2) as ser:
-                # 尝试读取数据
-                time.sleep(0.5)
-                if ser.in_waiting > 0:
-                    self._add_check(
-                        name="串口连接",
-                        desc="检测STM32串口是否可访问",
-                        func="serial.open()",
-                        expected="可读数据",
-                        result=CheckResult.PASS,
-                        msg=f"串口 {self.port} 可正常访问"
-                    )
-                else:
-                    self._add_check(
-                        name="串口连接",
-                        desc="检测STM32串口是否可访问",
-                        func="serial.open()",
-                        expected="可读数据",
-                        result=CheckResult.WARNING,
-                        msg=f"串口 {self.port} 打开成功，但无数据"
-                    )
-        except serial.SerialException as e:
-            self._add_check(
-                name="串口连接",
-                desc="检测STM32串口是否可访问",
-                func="serial.open()",
-                expected="可读数据",
-                result=CheckResult.FAIL,
-                msg=f"无法打开串口: {e}"
-            )
-    
-    def _check_stm32_connection(self, verbose: bool):
-        """检测STM32通信"""
-        # 发送版本请求
-        response = self._send_command("VERSION")
-        
-        if "v" in response or "STM32" in response:
-            self.stm32_connected = True
-            self._add_check(
-                name="STM32 通信",
-                desc="检测STM32是否响应",
-                func="VERSION",
-                expected="版本号",
-                result=CheckResult.PASS,
-                msg=f"STM32 响应: {response[:30]}"
-            )
-        else:
-            self._add_check(
-                name="STM32 通信",
-                desc="检测STM32是否响应",
-                func="VERSION",
-                expected="版本号",
-                result=CheckResult.FAIL,
-                msg="STM32 无响应，请检查:"
-                    "\n   - BOOT0 跳帽是否在正确位置"
-                    "\n - ST-Link 是否连接"
-                    "\n - 串口是否正确"
-            )
-    
-    def _check_esp32_connection(self, verbose: bool):
-        """检测ESP32通信"""
-        # 通过STM32查询ESP32状态
-        response = self._send_command("GET_ESP32_STATUS")
-        
-        if "ESP32" in response or "OK" in response:
-            self.esp32_connected = True
-            self._add_check(
-                name="ESP32 通信",
-                desc="检测ESP32是否正常通信",
-                func="GET_ESP32_STATUS",
-                expected="ESP32 OK",
-                result=CheckResult.PASS,
-                msg="ESP32 通信正常"
-            )
-        else:
-            self._add_check(
-                name="ESP32 通信",
-                desc="检测ESP32是否正常通信",
-                func="GET_ESP32_STATUS",
-                expected="ESP32 OK",
-                result=CheckResult.FAIL,
-                msg="ESP32 无响应，请检查:"
-                    "\n   - ESP32 是否已烧录固件"
-                    "\n - UART 连线是否正确 (TX/RX 交叉)"
-                    "\n - GPIO 0 是否拉高"
-            )
-    
-    def _check_imu(self, verbose: bool):
-        """检测IMU (MPU6050)"""
-        response = self._send_command("GET_IMU_ID")
-        
-        if "0x68" in response or "104" in response:
-            self._add_check(
-                name="IMU (MPU6050)",
-                desc="检测IMU芯片",
-                func="WHO_AM_I",
-                expected="0x68 (104)",
-                result=CheckResult.PASS,
-                msg="MPU6050 检测成功，地址: 0x68"
-            )
-        elif "FAIL" in response or "0" in response:
-            self._add_check(
-                name="IMU (MPU6050)",
-                desc="检测IMU芯片",
-                func="WHO_AM_I",
-                expected="0x68 (104)",
-                result=CheckResult.FAIL,
-                msg="IMU 无响应，请检查:"
-                    "\n   - VCC 是否 3.3V"
-                    "\n - GND 是否连接"
-                    "\n - SCL (PB6) 和 SDA (PB7) 连线"
-                    "\n - AD0 是否接地"
-            )
-        else:
-            self._add_check(
-                name="IMU (MPU6050)",
-                desc="检测IMU芯片",
-                func="WHO_AM_I",
-                expected="0x68 (104)",
-                result=CheckResult.WARNING,
-                msg="IMU 响应异常"
-            )
-    
-    def _check_motor_driver(self, verbose: bool):
-        """检测电机驱动"""
-        # 测试电机
-        response = self._send_command("TEST_MOTOR 100 100")
-        
-        if "OK" in response:
-            self._add_check(
-                name="电机驱动 (DRV8833)",
-                desc="检测电机驱动",
-                func="TEST_MOTOR",
-                expected="OK",
-                result=CheckResult.PASS,
-                msg="电机驱动正常"
-            )
-        else:
-            self._add_check(
-                name="电机驱动 (DRV8833)",
-                desc="检测电机驱动",
-                func="TEST_MOTOR",
-                expected="OK",
-                result=CheckResult.FAIL,
-                msg="电机测试失败，请检查:"
-                    "\n   - VMOT 是否接电池 (7-12V)"
-                    "\n - GND 是否公共地"
-                    "\n - IN1/IN2 (PE0/PE1) 和 IN3/IN4 (PE2/PE3)"
-                    "\n - 电机是否连接 OUT1-OUT4"
-            )
-    
-    def _check_power(self, verbose: bool):
-        """检测电源"""
-        response = self._send_command("GET_BATTERY")
-        
-        if "OK[" in response:
-            try:
-                # 解析电压
-                voltage = float(response.split('=')[1].split(']')[0])
-                
-                if 3.0 <= voltage <= 4.3:
-                    self._add_check(
-                        name="电池电压",
-                        desc="检测电池电压",
-                        func="GET_BATTERY",
-                        expected="3.0V - 4.3V",
-                        result=CheckResult.PASS,
-                        msg=f"电压正常: {voltage:.2f}V"
-                    )
-                elif voltage < 3.0:
-                    self._add_check(
-                        name="电池电压",
-                        desc="检测电池电压",
-                        func="GET_BATTERY",
-                        expected="3.0V - 4.3V",
-                        result=CheckResult.FAIL,
-                        msg=f"电压过低: {voltage:.2f}V，请充电"
-                    )
-                else:
-                    self._add_check(
-                        name="电池电压",
-                        desc="检测电池电压",
-                        func="GET_BATTERY",
-                        expected="3.0V - 4.3V",
-                        result=CheckResult.WARNING,
-                        msg=f"电压异常: {voltage:.2f}V"
-                    )
-            except:
-                self._add_check(
-                    name="电池电压",
-                    desc="检测电池电压",
-                    func="GET_BATTERY",
-                    expected="电压值",
-                    result=CheckResult.WARNING,
-                    msg=f"电压读取失败: {response}"
-                )
-        else:
-            self._add_check(
-                name="电池电压",
-                desc="检测电池电压",
-                func="GET_BATTERY",
-                expected="电压值",
-                result=CheckResult.FAIL,
-                msg="无法读取电压，请检查ADC连接"
-            )
-    
-    def _check_uart_loopback(self, verbose: bool):
-        """检测UART回环"""
-        # 发送测试数据并检查是否返回
-        test_data = "LOOPBACK_TEST"
-        response = self._send_command(f"ECHO {test_data}")
-        
-        if test_data in response:
-            self._add_check(
-                name="UART 回环测试",
-                desc="检测STM32 ↔ ESP32 UART连接",
-                func="ECHO",
-                expected="回显数据",
-                result=CheckResult.PASS,
-                msg="UART 通信正常"
-            )
-        elif self.esp32_connected:
-            self._add_check(
-                name="UART 回环测试",
-                desc="检测STM32 ↔ ESP32 UART连接",
-                func="ECHO",
-                expected="回显数据",
-                result=CheckResult.WARNING,
-                msg="回环测试无响应（ESP32可能未实现）"
-            )
-        else:
-            self._add_check(
-                name="UART 回环测试",
-                desc="检测STM32 ↔ ESP32 UART连接",
-                func="ECHO",
-                expected="回显数据",
-                result=CheckResult.FAIL,
-                msg="UART 通信失败，请检查:"
-                    "\n   - PA2 ↔ GPIO 17 (TX-RX)"
-                    "\n - PA3 ↔ GPIO 16 (RX-TX)"
-                    "\n - 注意: UART 是交叉连接的!"
-            )
-    
-    def _send_command(self, cmd: str, timeout: int = 2) -> str:
-        """发送命令并获取响应"""
-        try:
-            with serial.Serial(self.port, self.baud, timeout=timeout) as ser:
-                ser.write(f"{cmd}\r\n".encode())
-                time.sleep(0.2)
-                response = ser.read_all().decode(errors='ignore').strip()
-                return response
-        except:
-            return ""
-    
-    def print_wiring_diagram(self):
-        """打印连线图"""
-        print(WIRING_DIAGRAM)
-    
-    def show_auto_fixes(self):
-        """显示自动修复建议"""
-        failures = [c for c in self.checks if c.result == CheckResult.FAIL]
-        
-        if not failures:
-            print("\n✅ 没有发现连线错误！")
-            return
-        
-        print(f"\n{'='*60}")
-        print("  🔧 自动修复建议")
-        print(f"{'='*60}\n")
-        
-        fix_map = {
-            '串口连接': """
+@functools.lru_cache(maxsize=None)
+def get_wiring_diagram() -> str:
+    """加载连线图"""
+    with open(_WIRING_DIAGRAM_PATH, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def __getattr__(name: str):
+    # 兼容旧的 WIRING_DIAGRAM 常量
+    if name == "WIRING_DIAGRAM":
+        return get_wiring_diagram()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ============ 响应解析 ============
+# 版本号: "STM32..." 或 "v1.2" / "1.2.0"
+_VERSION_RE = re.compile(r"STM32|\bv?\d+\.\d+")
+# MPU6050 WHO_AM_I: 0x68 (十进制 104)
+_IMU_ID_RE = re.compile(r"0x68|\b104\b")
+# 电池电压: "OK[BATT=3.85]"
+_BATTERY_RE = re.compile(r"OK\[[^=\]]*=(?P<voltage>[^\]]*)\]")
+
+
+def _parse_voltage(response: str) -> Optional[float]:
+    """解析 GET_BATTERY 响应中的电压, 格式不对时返回 None"""
+    match = _BATTERY_RE.search(response)
+    if match is None:
+        return None
+    try:
+        return float(match.group('voltage'))
+    except ValueError:
+        return None
+
+
+# 标题分隔线
+_SEP60 = "=" * 60
+
+# 报告中的统计类别, 检测结果 -> 类别下标
+_SUMMARY_KEYS = ('pass', 'fail', 'warning', 'skip')
+_RESULT_INDEX = {
+    CheckResult.PASS: 0,
+    CheckResult.FAIL: 1,
+    CheckResult.WARNING: 2,
+    CheckResult.SKIP: 3,
+    CheckResult.UNKNOWN: 3,
+}
+
+
+# ============ 检测项 ============
+# 每个检测项的固定信息, 按键记录结果时只替换 result/message
+CHECK_SPECS = MappingProxyType({
+    'serial': WireCheck(name="串口连接", description="检测STM32串口是否可访问",
+                        check_func="serial.open()", expected="串口可打开",
+                        fix_key="串口连接"),
+    'stm32': WireCheck(name="STM32 通信", description="检测STM32是否响应",
+                       check_func="VERSION", expected="版本号",
+                       fix_key="STM32 通信"),
+    'esp32': WireCheck(name="ESP32 通信", description="检测ESP32是否正常通信",
+                       check_func="GET_ESP32_STATUS", expected="ESP32 OK",
+                       fix_key="ESP32"),
+    'imu': WireCheck(name="IMU (MPU6050)", description="检测IMU芯片",
+                     check_func="WHO_AM_I", expected="0x68 (104)",
+                     fix_key="IMU"),
+    'motor': WireCheck(name="电机驱动 (DRV8833)", description="检测电机驱动",
+                       check_func="TEST_MOTOR", expected="OK",
+                       fix_key="电机"),
+    'battery': WireCheck(name="电池电压", description="检测电池电压",
+                         check_func="GET_BATTERY", expected="3.0V - 4.3V",
+                         fix_key="电池"),
+    'uart': WireCheck(name="UART 回环测试", description="检测STM32 ↔ ESP32 UART连接",
+                      check_func="ECHO", expected="回显数据",
+                      fix_key="UART"),
+})
+
+
+# ============ 修复建议 ============
+# 按检测项的 fix_key 查找
+_FIX_MAP: Dict[str, str] = {
+    '串口连接': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  串口问题                                                      ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -588,8 +268,8 @@ class WireChecker:
 ║ 3. 检查 BOOT0 跳帽位置                                       ║
 ║ 4. 尝试不同的波特率 (115200, 9600)                          ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
-            'STM32 通信': """
+""",
+    'STM32 通信': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  STM32 无响应                                                  ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -604,8 +284,8 @@ class WireChecker:
 ║ 2. 按复位键                                                   ║
 ║ 3. 检查固件是否已烧录                                         ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
-            'ESP32': """
+""",
+    'ESP32': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  ESP32 无响应                                                  ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -621,8 +301,8 @@ class WireChecker:
 ║ 2. 确认 ESP32 已烧录固件                                      ║
 ║ 3. 检查 GPIO0 电平 (上拉 = 3.3V)                             ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
-            'IMU': """
+""",
+    'IMU': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  MPU6050 无响应                                                ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -638,8 +318,8 @@ class WireChecker:
 ║ 2. 确认 I2C 地址正确 (0x68)                                   ║
 ║ 3. 检查是否有虚焊                                             ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
-            '电机': """
+""",
+    '电机': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  电机驱动问题                                                   ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -656,8 +336,8 @@ class WireChecker:
 ║ □ 电池是否已充电                                               ║
 ║ □ 不要短路电机输出                                             ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
-            '电池': """
+""",
+    '电池': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  电池问题                                                      ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -673,8 +353,8 @@ class WireChecker:
 ║ 3. 检查分压电阻 (100K+100K)                                   ║
 ║ 4. 确认 VBAT 连接正确                                         ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
-            'UART': """
+""",
+    'UART': """
 ╔═══════════════════════════════════════════════════════════════╗
 ║  UART 通信问题                                                 ║
 ╠═══════════════════════════════════════════════════════════════╣
@@ -689,27 +369,419 @@ class WireChecker:
 ║ □ STM32 PA3 (RX) ← ESP32 GPIO16 (TX) 黄色线                   ║
 ║ □ GND 共连                                                     ║
 ╚═══════════════════════════════════════════════════════════════╝
-            """,
+""",
+}
+
+
+# ============ 连线检测器 ============
+class WireChecker:
+    """
+    硬件连线检测器
+    
+    所有检测共用一个串口会话:
+        with WireChecker('COM3') as checker:
+            checker.run_all_checks()
+    不使用 with 时, run_all_checks 会在检测期间自行打开和关闭串口。
+    """
+    
+    # 串口读超时 (秒)
+    TIMEOUT = 0.2
+    
+    # 按命令名覆盖读超时。响应以换行结束, 超时只是设备无响应时的等待上限:
+    # 版本查询只有几个字节; 电机测试留给实际驱动电机 (约 0.5 秒) 的固件
+    # 批量命令的超时为各命令超时之和
+    COMMAND_TIMEOUTS = {
+        "VERSION": 0.1,
+        "TEST_MOTOR": 1.0,
+    }
+    
+    # 固件 (stm32_wire_check.c) 的每条响应以 "\r\n" 结尾, 读到换行即响应结束
+    TERMINATOR = b"\n"
+    
+    # UART 回环测试数据
+    LOOPBACK_DATA = "LOOPBACK_TEST"
+    
+    # 各检测项的查询命令, 运行检测时一次批量发送
+    PROBE_COMMANDS = ("VERSION", "GET_ESP32_STATUS", "GET_IMU_ID",
+                      "TEST_MOTOR 100 100", "GET_BATTERY", f"ECHO {LOOPBACK_DATA}")
+    
+    def __init__(self, port: str, baud: int = 115200):
+        self.port = port
+        self.baud = baud
+        self.checks: List[WireCheck] = []
+        self.stm32_connected = False
+        self.esp32_connected = False
+        
+        self._ser: Optional["serial.Serial"] = None
+        self._open_error: Optional["serial.SerialException"] = None
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+    
+    def open(self) -> bool:
+        """打开串口, 失败时记录错误 (由串口连接检测项报告) 而不抛出"""
+        if self._ser is None:
+            import serial
+            try:
+                self._ser = serial.Serial(self.port, self.baud, timeout=self.TIMEOUT)
+                self._open_error = None
+                self._enable_low_latency()
+            except serial.SerialException as e:
+                self._open_error = e
+        return self._ser is not None
+    
+    def _enable_low_latency(self):
+        """
+        开启 USB 串口的低延迟模式 (Linux ASYNC_LOW_LATENCY)
+        
+        FTDI 等芯片默认每 16ms 才上报一次短数据包, 每条命令都要多等一个周期。
+        其他平台或驱动不支持时忽略。
+        """
+        try:
+            self._ser.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, ValueError, OSError):
+            pass
+    
+    def close(self):
+        """关闭串口"""
+        if self._ser is not None:
+            self._ser.close()
+            self._ser = None
+    
+    def run_all_checks(self, verbose: bool = False) -> Dict:
+        """运行所有检测"""
+        own_session = self._ser is None
+        if own_session:
+            self.open()
+        try:
+            return self._run_all_checks(verbose)
+        finally:
+            if own_session:
+                self.close()
+    
+    def _run_all_checks(self, verbose: bool) -> Dict:
+        results = {
+            'timestamp': datetime.now().isoformat(),
+            'port': self.port,
+            'checks': [],
         }
         
+        print(f"\n{_SEP60}\n  🔌 硬件连线检测器 v1.0\n{_SEP60}\n")
+        
+        # 1. 检测串口连接
+        self._check_serial_connection(verbose)
+        
+        # 一次取得其余检测项的全部响应
+        responses = self._query_all(self.PROBE_COMMANDS)
+        version, esp32, imu, motor, battery, echo = (
+            responses[cmd] for cmd in self.PROBE_COMMANDS)
+        
+        # 2. 检测STM32通信
+        self._check_stm32_connection(verbose, version)
+        
+        # 3. 检测ESP32通信
+        self._check_esp32_connection(verbose, esp32)
+        
+        # 4. 检测IMU
+        self._check_imu(verbose, imu)
+        
+        # 5. 检测电机驱动
+        self._check_motor_driver(verbose, motor)
+        
+        # 6. 检测电源
+        self._check_power(verbose, battery)
+        
+        # 7. 检测UART连接
+        self._check_uart_loopback(verbose, echo)
+        
+        # 打印结果
+        print(f"\n{_SEP60}\n  检测结果\n{_SEP60}\n")
+        
+        # 拼接后一次写出
+        lines = []
+        counts = [0, 0, 0, 0]  # pass, fail, warning, skip
+        for check in self.checks:
+            counts[_RESULT_INDEX[check.result]] += 1
+            icon = check.result.value
+            lines.append(f"{icon} {check.name}: {check.message}\n")
+            results['checks'].append({
+                'name': check.name,
+                'result': check.result.value,
+                'message': check.message
+            })
+        sys.stdout.write("".join(lines))
+        sys.stdout.flush()
+        
+        results['summary'] = dict(zip(_SUMMARY_KEYS, counts))
+        
+        # 打印总结
+        summary = results['summary']
+        print(f"\n{_SEP60}\n"
+              f"  总结: {summary['pass']} 通过, {summary['fail']} 失败, {summary['warning']} 警告\n"
+              f"{_SEP60}")
+        
+        return results
+    
+    def _record(self, key: str, result: CheckResult, msg: str, **changes):
+        """按 CHECK_SPECS 中的检测项记录一条检测结果"""
+        self.checks.append(replace(CHECK_SPECS[key], result=result, message=msg, **changes))
+    
+    def _check_serial_connection(self, verbose: bool):
+        """检测串口连接 (根据会话串口是否打开成功判断)"""
+        if self._ser is not None:
+            self._record('serial', CheckResult.PASS, f"串口 {self.port} 可正常访问")
+        else:
+            self._record('serial', CheckResult.FAIL, f"无法打开串口: {self._open_error}")
+    
+    def _check_stm32_connection(self, verbose: bool, response: str):
+        """检测STM32通信 (VERSION 的响应)"""
+        if _VERSION_RE.search(response):
+            self.stm32_connected = True
+            self._record('stm32', CheckResult.PASS, f"STM32 响应: {response[:30]}")
+        else:
+            self._record('stm32', CheckResult.FAIL,
+                         "STM32 无响应，请检查:"
+                         "\n   - BOOT0 跳帽是否在正确位置"
+                         "\n - ST-Link 是否连接"
+                         "\n - 串口是否正确")
+    
+    def _check_esp32_connection(self, verbose: bool, response: str):
+        """检测ESP32通信 (通过STM32查询的 GET_ESP32_STATUS 响应)"""
+        if "ESP32" in response or "OK" in response:
+            self.esp32_connected = True
+            self._record('esp32', CheckResult.PASS, "ESP32 通信正常")
+        else:
+            self._record('esp32', CheckResult.FAIL,
+                         "ESP32 无响应，请检查:"
+                         "\n   - ESP32 是否已烧录固件"
+                         "\n - UART 连线是否正确 (TX/RX 交叉)"
+                         "\n - GPIO 0 是否拉高")
+    
+    def _check_imu(self, verbose: bool, response: str):
+        """检测IMU (MPU6050) (GET_IMU_ID 的响应)"""
+        if _IMU_ID_RE.search(response):
+            self._record('imu', CheckResult.PASS, "MPU6050 检测成功，地址: 0x68")
+        elif "FAIL" in response or "0" in response:
+            self._record('imu', CheckResult.FAIL,
+                         "IMU 无响应，请检查:"
+                         "\n   - VCC 是否 3.3V"
+                         "\n - GND 是否连接"
+                         "\n - SCL (PB6) 和 SDA (PB7) 连线"
+                         "\n - AD0 是否接地")
+        else:
+            self._record('imu', CheckResult.WARNING, "IMU 响应异常")
+    
+    def _check_motor_driver(self, verbose: bool, response: str):
+        """检测电机驱动 (TEST_MOTOR 的响应)"""
+        if "OK" in response:
+            self._record('motor', CheckResult.PASS, "电机驱动正常")
+        else:
+            self._record('motor', CheckResult.FAIL,
+                         "电机测试失败，请检查:"
+                         "\n   - VMOT 是否接电池 (7-12V)"
+                         "\n - GND 是否公共地"
+                         "\n - IN1/IN2 (PE0/PE1) 和 IN3/IN4 (PE2/PE3)"
+                         "\n - 电机是否连接 OUT1-OUT4")
+    
+    def _check_power(self, verbose: bool, response: str):
+        """检测电源 (GET_BATTERY 的响应)"""
+        if "OK[" in response:
+            voltage = _parse_voltage(response)
+            
+            if voltage is None:
+                self._record('battery', CheckResult.WARNING, f"电压读取失败: {response}",
+                             expected="电压值")
+            elif 3.0 <= voltage <= 4.3:
+                self._record('battery', CheckResult.PASS, f"电压正常: {voltage:.2f}V")
+            elif voltage < 3.0:
+                self._record('battery', CheckResult.FAIL, f"电压过低: {voltage:.2f}V，请充电")
+            else:
+                self._record('battery', CheckResult.WARNING, f"电压异常: {voltage:.2f}V")
+        else:
+            self._record('battery', CheckResult.FAIL, "无法读取电压，请检查ADC连接",
+                         expected="电压值")
+    
+    def _check_uart_loopback(self, verbose: bool, response: str):
+        """检测UART回环 (ECHO 测试数据的响应)"""
+        if self.LOOPBACK_DATA in response:
+            self._record('uart', CheckResult.PASS, "UART 通信正常")
+        elif self.esp32_connected:
+            self._record('uart', CheckResult.WARNING, "回环测试无响应（ESP32可能未实现）")
+        else:
+            self._record('uart', CheckResult.FAIL,
+                         "UART 通信失败，请检查:"
+                         "\n   - PA2 ↔ GPIO 17 (TX-RX)"
+                         "\n - PA3 ↔ GPIO 16 (RX-TX)"
+                         "\n - 注意: UART 是交叉连接的!")
+    
+    def _query_all(self, cmds: Tuple[str, ...]) -> Dict[str, str]:
+        """查询多条命令的响应 {命令: 响应}, 固件不支持批量命令时逐条发送"""
+        responses = self._send_batch(cmds)
+        if responses is None:
+            responses = [self._send_command(cmd) for cmd in cmds]
+        return dict(zip(cmds, responses))
+    
+    def _send_batch(self, cmds: Tuple[str, ...]) -> Optional[List[str]]:
+        """
+        一次发送多条命令: "BATCH cmd1;cmd2;..."
+        
+        固件 (stm32_wire_check.c 的 process_batch) 按顺序执行后返回一行
+        "resp1;resp2;...;END"。响应不是这个格式 (如旧固件的 UNKNOWN_CMD,
+        或固件响应缓冲区放不下全部响应) 时返回 None。
+        """
+        if self._ser is None:
+            return None
+        
+        timeout = sum(self._command_timeout(cmd) for cmd in cmds)
+        response = self._send_command("BATCH " + ";".join(cmds), timeout=timeout)
+        parts = response.split(";")
+        if len(parts) != len(cmds) + 1 or parts[-1] != "END":
+            return None
+        return [part.strip() for part in parts[:-1]]
+    
+    def _command_timeout(self, cmd: str) -> float:
+        """命令的读超时 (秒)"""
+        return self.COMMAND_TIMEOUTS.get(cmd.split(" ", 1)[0], self.TIMEOUT)
+    
+    def _send_command(self, cmd: str, timeout: Optional[float] = None) -> str:
+        """
+        在会话串口上发送命令, 读到响应行尾为止
+        
+        固件响应一到立即返回; 超时后返回已收到的数据。
+        timeout 默认按命令名取 COMMAND_TIMEOUTS, 是等待的上限。
+        """
+        if self._ser is None:
+            return ""
+        import serial
+        if timeout is None:
+            timeout = self._command_timeout(cmd)
+        try:
+            self._ser.reset_input_buffer()
+            self._ser.write(f"{cmd}\r\n".encode())
+            if timeout != self.TIMEOUT:
+                self._ser.timeout = timeout
+            try:
+                response = self._ser.read_until(self.TERMINATOR, 1024)
+            finally:
+                if timeout != self.TIMEOUT:
+                    self._ser.timeout = self.TIMEOUT
+            return response.decode(errors='ignore').strip()
+        except (serial.SerialException, OSError):
+            return ""
+    
+    def print_wiring_diagram(self):
+        """打印连线图"""
+        print(get_wiring_diagram())
+    
+    def show_auto_fixes(self):
+        """显示自动修复建议"""
+        failures = [c for c in self.checks if c.result == CheckResult.FAIL]
+        
+        if not failures:
+            print("\n✅ 没有发现连线错误！")
+            return
+        
+        print(f"\n{_SEP60}\n  🔧 自动修复建议\n{_SEP60}\n")
+        
+        lines = []
         for check in failures:
-            print(f"\n--- {check.name} ---\n")
+            lines.append(f"\n--- {check.name} ---\n\n")
             
-            # 查找匹配的建议
-            suggestion = None
-            for key, value in fix_map.items():
-                if key in check.name:
-                    suggestion = value
-                    break
+            # 查找匹配的建议 (没有 fix_key 的检测项按名称匹配)
+            suggestion = _FIX_MAP.get(check.fix_key)
+            if suggestion is None:
+                suggestion = next((v for k, v in _FIX_MAP.items() if k in check.name), None)
             
-            if suggestion:
-                print(suggestion)
-            else:
-                print(check.message)
+            lines.append(f"{suggestion or check.message}\n")
+        
+        sys.stdout.write("".join(lines))
+        sys.stdout.flush()
+
+
+# ============ 串口查找 ============
+# 上次检测成功的串口, 下次未指定 --port 时优先尝试 (超过 1 天失效)
+_PORT_CACHE_PATH = Path.home() / ".cache" / "physical-agi" / "wire_check.json"
+_PORT_CACHE_TTL = 24 * 3600
+
+
+def _load_port_cache() -> Optional[Dict]:
+    """读取串口缓存 {"port", "baud", "vid_pid", "ts"}, 不存在或已过期时返回 None"""
+    import json
+    try:
+        cache = json.loads(_PORT_CACHE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or time.time() - cache.get('ts', 0) > _PORT_CACHE_TTL:
+        return None
+    return cache
+
+
+def _save_port_cache(port: str, baud: int, vid_pid: Optional[str] = None):
+    """记录检测成功的串口"""
+    import json
+    cache = {'port': port, 'baud': baud, 'vid_pid': vid_pid, 'ts': time.time()}
+    try:
+        _PORT_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(_PORT_CACHE_PATH, json.dumps(cache).encode('utf-8'))
+    except OSError:
+        pass
+
+
+def _probe_port(port: str, baud: int) -> bool:
+    """发送 VERSION, 检查端口上是否为响应的 STM32"""
+    checker = WireChecker(port, baud)
+    if not checker.open():
+        return False
+    try:
+        return bool(_VERSION_RE.search(checker._send_command("VERSION")))
+    finally:
+        checker.close()
+
+
+def find_port(baud: int = 115200) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    查找连接 STM32 的串口, 返回 (端口, VID:PID)
+    
+    先尝试缓存的上次成功的端口, 失败后再枚举所有串口逐个探测。
+    """
+    cache = _load_port_cache()
+    if cache and _probe_port(cache['port'], baud):
+        return cache['port'], cache.get('vid_pid')
+    
+    from serial.tools import list_ports
+    for info in list_ports.comports():
+        if cache and info.device == cache['port']:
+            continue
+        if _probe_port(info.device, baud):
+            vid_pid = f"{info.vid:04X}:{info.pid:04X}" if info.vid is not None else None
+            return info.device, vid_pid
+    return None
 
 
 # ============ 主程序 ============
+def _dumps(obj) -> bytes:
+    """格式化 JSON 报告, UTF-8 编码 (有 orjson 时使用 orjson)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    import json
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _atomic_write(path: Path, data: bytes):
+    """先写入临时文件再原子替换, 中途崩溃不会留下不完整的文件"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
 def main():
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="硬件连线检测器",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -718,6 +790,9 @@ def main():
   # 基本检测
   python wire_check.py --port COM3
   
+  # 自动查找串口 (优先使用上次成功的串口)
+  python wire_check.py
+  
   # 详细模式
   python wire_check.py --port COM3 --verbose
   
@@ -730,7 +805,8 @@ def main():
         """
     )
     
-    parser.add_argument('--port', default='COM3', help='串口号')
+    parser.add_argument('--port', default=None,
+                        help='串口号 (默认使用上次成功的串口或自动查找)')
     parser.add_argument('--baud', type=int, default=115200, help='波特率')
     parser.add_argument('--verbose', '-v', action='store_true', help='详细输出')
     parser.add_argument('--diagram', '-d', action='store_true', help='显示连线图')
@@ -739,23 +815,35 @@ def main():
     
     # 显示连线图
     if args.diagram:
-        print(WIRING_DIAGRAM)
+        print(get_wiring_diagram())
         return
     
-    # 运行检测
-    checker = WireChecker(args.port, args.baud)
-    checker.print_wiring_diagram()
-    results = checker.run_all_checks(args.verbose)
+    # 确定串口
+    port, vid_pid = args.port, None
+    if port is None:
+        found = find_port(args.baud)
+        if found is None:
+            print("未找到响应的 STM32 串口，请用 --port 指定")
+            return
+        port, vid_pid = found
+        print(f"使用串口: {port}")
+    
+    # 运行检测 (整个检测过程共用一个串口会话)
+    with WireChecker(port, args.baud) as checker:
+        checker.print_wiring_diagram()
+        results = checker.run_all_checks(args.verbose)
+    
+    if checker.stm32_connected:
+        _save_port_cache(port, args.baud, vid_pid)
     
     # 自动修复建议
     if args.auto_fix:
         checker.show_auto_fixes()
     
     # 保存结果
-    report_path = f"reports/wire_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    Path("reports").mkdir(exist_ok=True)
-    with open(report_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    report_path = Path("reports") / f"wire_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report_path.parent.mkdir(exist_ok=True)
+    _atomic_write(report_path, _dumps(results))
     
     print(f"\n报告已保存: {report_path}")
 
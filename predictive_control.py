@@ -11,12 +11,21 @@
 4. 行为规划 - 生成应对策略
 """
 
+import math
+import random
 import numpy as np
-from typing import List, Tuple, Optional
+from collections import deque
+from collections.abc import Sequence
+from typing import Deque, List, Tuple, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 class ReactionType(Enum):
     """反应类型"""
@@ -29,7 +38,7 @@ class ReactionType(Enum):
     STOP = "stop"           # 停止
 
 
-@dataclass
+@dataclass(slots=True)
 class EnvironmentState:
     """环境状态"""
     timestamp: float
@@ -54,19 +63,59 @@ class EnvironmentState:
             self.temperature,
             self.battery_level,
             len(self.neighbors),
-            np.mean(self.rssi_values) if self.rssi_values else -100
+            sum(self.rssi_values) / len(self.rssi_values) if self.rssi_values else -100
         ]
         return np.array(features, dtype=np.float32)
 
 
-@dataclass
+# 预测轨迹数组 (steps, 7) 的列
+TRAJ_TIMESTAMP, TRAJ_X, TRAJ_Y, TRAJ_VX, TRAJ_VY, TRAJ_OBSTACLE, TRAJ_BATTERY = range(7)
+# 各列相对预测步数的滞后 (障碍物距离和电量第 1 步仍为当前值)
+_TRAJ_LAG = np.array((0, 0, 0, 0, 0, 1, 1), dtype=np.float64)
+
+
+class StateTrajectory(Sequence):
+    """
+    预测轨迹的只读序列视图
+    
+    数值保存在 (steps, 7) 数组中, 按下标访问时才生成 EnvironmentState;
+    目标、障碍物方向沿用起始状态。
+    """
+    
+    def __init__(self, origin: EnvironmentState, states: np.ndarray):
+        self.origin = origin
+        self.states = states
+    
+    def __len__(self) -> int:
+        return len(self.states)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._to_state(row) for row in self.states[index]]
+        return self._to_state(self.states[index])
+    
+    def _to_state(self, row: np.ndarray) -> EnvironmentState:
+        timestamp, x, y, vx, vy, obs_dist, battery = row.tolist()
+        return EnvironmentState(
+            timestamp=timestamp,
+            position=(x, y),
+            velocity=(vx, vy),
+            target=self.origin.target,
+            obstacle_distance=obs_dist,
+            obstacle_direction=self.origin.obstacle_direction,
+            battery_level=battery
+        )
+
+
+@dataclass(slots=True)
 class Prediction:
     """预测结果"""
     timestamp: float
     horizon: float           # 预测时间范围 (秒)
-    predicted_states: List[EnvironmentState] = field(default_factory=list)
+    predicted_states: Sequence = field(default_factory=list)
     confidence: float = 0.0
     risk_level: float = 0.0  # 风险等级 0-1
+    state_array: Optional[np.ndarray] = None  # 预测轨迹 (steps, 7), 列见 TRAJ_*
     
     @property
     def has_collision_risk(self) -> bool:
@@ -74,15 +123,21 @@ class Prediction:
     
     @property
     def has_goal_reached(self) -> bool:
-        if not self.predicted_states:
+        states = self.predicted_states
+        if not states:
             return False
-        final = self.predicted_states[-1]
-        dist = np.sqrt((final.position[0] - final.target[0])**2 + 
-                       (final.position[1] - final.target[1])**2)
-        return dist < 0.1
+        if isinstance(states, StateTrajectory):
+            # 直接读轨迹数组, 不生成 EnvironmentState
+            x, y = states.states[-1, TRAJ_X], states.states[-1, TRAJ_Y]
+            target = states.origin.target
+        else:
+            final = states[-1]
+            x, y = final.position
+            target = final.target
+        return math.hypot(x - target[0], y - target[1]) < 0.1
 
 
-@dataclass
+@dataclass(slots=True)
 class Reaction:
     """反应动作"""
     reaction_type: ReactionType
@@ -92,150 +147,256 @@ class Reaction:
     priority: int = 0  # 优先级
 
 
+# ============ 数值内核 (有 numba 时编译) ============
+
+def _kalman_step(state: np.ndarray, cov: np.ndarray, z: np.ndarray, dt: float,
+                 accel_var: float, pos_var: float, vel_var: float) -> float:
+    """
+    匀速模型卡尔曼滤波的一步预测 + 更新 (原地修改 state/cov)
+    
+    state: [x, y, vx, vy]; cov: (2, 2, 2), 每个轴 (位置, 速度) 的协方差;
+    z: 测量值 [x, y, vx, vy]。两个轴互不耦合, 各自按 2 维滤波计算。
+    返回归一化新息平方 (NIS), 测量符合匀速模型时期望值为 4。
+    """
+    dt2 = dt * dt
+    nis = 0.0
+    for a in range(2):
+        c = cov[a]
+        
+        # 预测: x = F x, P = F P F^T + Q (Q 为加速度白噪声)
+        p = state[a] + dt * state[2 + a]
+        v = state[2 + a]
+        p00 = c[0, 0] + dt * (c[0, 1] + c[1, 0]) + dt2 * c[1, 1] + accel_var * dt2 * dt2 / 4
+        p01 = c[0, 1] + dt * c[1, 1] + accel_var * dt2 * dt / 2
+        p11 = c[1, 1] + accel_var * dt2
+        
+        # 更新: K = P (P + R)^-1, x += K (z - x), P = (I - K) P
+        s00 = p00 + pos_var
+        s11 = p11 + vel_var
+        det = s00 * s11 - p01 * p01
+        k00 = (p00 * s11 - p01 * p01) / det
+        k01 = (p01 * s00 - p00 * p01) / det
+        k10 = (p01 * s11 - p11 * p01) / det
+        k11 = (p11 * s00 - p01 * p01) / det
+        
+        e_p = z[a] - p
+        e_v = z[2 + a] - v
+        nis += (s11 * e_p * e_p - 2 * p01 * e_p * e_v + s00 * e_v * e_v) / det
+        state[a] = p + k00 * e_p + k01 * e_v
+        state[2 + a] = v + k10 * e_p + k11 * e_v
+        
+        c[0, 0] = (1 - k00) * p00 - k01 * p01
+        c[0, 1] = c[1, 0] = (1 - k00) * p01 - k01 * p11
+        c[1, 1] = (1 - k11) * p11 - k10 * p01
+    
+    return nis
+
+
+def _risk_score(obstacle_distance: float, battery_level: float,
+                dist_to_target: float, predicted_obstacle: np.ndarray) -> float:
+    """风险等级 0-1, 见 Predictor._calculate_risk"""
+    risk = 0.0
+    
+    # 障碍物风险
+    if obstacle_distance < 0.5:
+        risk += 0.5
+    elif obstacle_distance < 1.0:
+        risk += 0.3
+    
+    # 预测碰撞风险
+    for d in predicted_obstacle:
+        if d < 0.3:
+            risk += 0.2
+            break
+    
+    # 电池风险
+    if battery_level < 20:
+        risk += 0.2
+    elif battery_level < 50:
+        risk += 0.1
+    
+    # 目标距离风险
+    if dist_to_target > 10:
+        risk += 0.1
+    
+    return min(1.0, risk)
+
+
+if njit is not None:
+    _kalman_step = njit(cache=True, nogil=True)(_kalman_step)
+    _risk_score = njit(cache=True, nogil=True)(_risk_score)
+    
+    # 导入时先编译 (有缓存时只是加载), 避免第一次预测卡顿
+    _kalman_step(np.zeros(4), np.ones((2, 2, 2)), np.zeros(4), 0.1, 1.0, 1.0, 1.0)
+    # 障碍物距离取自轨迹矩阵的一列 (非连续视图), 按同样的布局编译
+    _risk_score(1.0, 100.0, 0.0, np.zeros((2, TRAJ_BATTERY + 1))[:, TRAJ_OBSTACLE])
+
+
 class Predictor:
-    """预测器 - 基于历史数据预测未来状态"""
+    """预测器 - 用匀速模型卡尔曼滤波估计位置和速度, 外推未来状态"""
+    
+    # 卡尔曼滤波噪声 (标准差)
+    ACCEL_NOISE = 0.5       # 过程噪声: 未建模的加速度 (m/s²)
+    POSITION_NOISE = 0.05   # 位置测量噪声 (m)
+    VELOCITY_NOISE = 0.1    # 速度测量噪声 (m/s)
+    
+    # 置信度: 位置估计的标准差与该容差 (m, 与到达目标的判定半径一致) 相当时为 0.5;
+    # 测量与匀速模型不符时 (NIS 均值超过期望值 4) 按比例放大方差
+    CONFIDENCE_TOLERANCE = 0.1
+    NIS_SMOOTHING = 0.3     # NIS 指数平均的权重
     
     def __init__(self, history_size: int = 50):
-        self.history: List[EnvironmentState] = []
+        self.history: Deque[EnvironmentState] = deque(maxlen=history_size)
         self.history_size = history_size
         
-        # 简单线性预测参数
-        self.velocity_trend = np.zeros(2)
-        self.position_trend = np.zeros(2)
-        
+        # 滤波状态 [x, y, vx, vy], 每个轴 (位置, 速度) 的协方差, 及其对应的时间戳
+        self._kf_state = np.zeros(4)
+        self._kf_cov = np.zeros((2, 2, 2))
+        self._kf_time: Optional[float] = None
+        self._nis = 4.0  # NIS 的指数平均
+    
+    @property
+    def position_trend(self) -> np.ndarray:
+        """滤波后的位置估计 [x, y]"""
+        return self._kf_state[:2].copy()
+    
+    @property
+    def velocity_trend(self) -> np.ndarray:
+        """滤波后的速度估计 [vx, vy]"""
+        return self._kf_state[2:].copy()
+    
     def add_state(self, state: EnvironmentState):
-        """添加状态到历史"""
-        self.history.append(state)
-        if len(self.history) > self.history_size:
-            self.history.pop(0)
-        self._update_trends()
-    
-    def _update_trends(self):
-        """更新趋势"""
-        if len(self.history) < 3:
-            return
+        """添加状态到历史, 并用其位置和速度更新滤波"""
+        self.history.append(state)  # 超出 history_size 时自动丢弃最旧的状态
         
-        # 计算速度趋势
-        velocities = np.array([(s.velocity[0], s.velocity[1]) for s in self.history[-10:]])
-        self.velocity_trend = np.mean(velocities, axis=0)
+        z = np.array((state.position[0], state.position[1],
+                      state.velocity[0], state.velocity[1]), dtype=np.float64)
+        pos_var = self.POSITION_NOISE ** 2
+        vel_var = self.VELOCITY_NOISE ** 2
         
-        # 计算位置趋势
-        positions = np.array([(s.position[0], s.position[1]) for s in self.history[-10:]])
-        self.position_trend = np.mean(positions, axis=0)
+        if self._kf_time is None:
+            # 第一次测量: 直接作为初始估计
+            self._kf_state[:] = z
+            self._kf_cov[:] = ((pos_var, 0.0), (0.0, vel_var))
+            self._kf_time = state.timestamp
+        else:
+            # 时间戳倒退时不做外推, 只用测量更新
+            dt = max(0.0, state.timestamp - self._kf_time)
+            nis = _kalman_step(self._kf_state, self._kf_cov, z, dt,
+                               self.ACCEL_NOISE ** 2, pos_var, vel_var)
+            self._nis += self.NIS_SMOOTHING * (nis - self._nis)
+            self._kf_time += dt
     
     def predict(self, current_state: EnvironmentState, horizon: float = 1.0, steps: int = 10) -> Prediction:
         """预测未来状态"""
         if len(self.history) < 3:
             # 历史数据不足，返回默认预测
+            row = (current_state.timestamp, current_state.position[0], current_state.position[1],
+                   current_state.velocity[0], current_state.velocity[1],
+                   current_state.obstacle_distance, current_state.battery_level)
             return Prediction(
                 timestamp=current_state.timestamp,
                 horizon=horizon,
                 predicted_states=[current_state] * steps,
                 confidence=0.0,
-                risk_level=0.0
+                risk_level=0.0,
+                state_array=np.tile(np.array(row, dtype=np.float64), (steps, 1))
             )
         
-        predicted_states = []
         dt = horizon / steps
         
-        # 预测位置
-        pos = current_state.position
-        vel = current_state.velocity
+        # 从滤波估计出发; current_state 晚于最后一次测量时先外推到它的时刻
+        x, y, vx, vy = self._kf_state.tolist()
+        lead = current_state.timestamp - self._kf_time
         
-        for i in range(steps):
-            # 简单预测: 位置 += 速度 * dt
-            new_pos = (
-                pos[0] + vel[0] * dt * (i + 1),
-                pos[1] + vel[1] * dt * (i + 1)
-            )
-            
-            # 预测障碍物
-            obs_dist = current_state.obstacle_distance - i * 0.1
-            obs_dir = current_state.obstacle_direction
-            
-            state = EnvironmentState(
-                timestamp=current_state.timestamp + dt * (i + 1),
-                position=new_pos,
-                velocity=vel,
-                target=current_state.target,
-                obstacle_distance=max(0, obs_dist),
-                obstacle_direction=obs_dir,
-                battery_level=max(0, current_state.battery_level - i * 0.5)
-            )
-            predicted_states.append(state)
+        # 整条轨迹一次计算: 每列 = 当前值 + 步数 * 每步变化量
+        # 匀速预测: 位置 += 速度 * dt; 障碍物距离和电量从第 2 步开始递减
+        origin = np.array((current_state.timestamp, x + vx * lead, y + vy * lead, vx, vy,
+                           current_state.obstacle_distance, current_state.battery_level))
+        rate = np.array((dt, vx * dt, vy * dt, 0.0, 0.0, -0.1, -0.5))
+        ahead = np.arange(1, steps + 1, dtype=np.float64)[:, None] - _TRAJ_LAG
+        states = origin + ahead * rate
+        np.maximum(states[:, TRAJ_OBSTACLE:], 0, out=states[:, TRAJ_OBSTACLE:])
         
-        # 计算置信度 (基于历史一致性)
-        confidence = min(1.0, len(self.history) / 20)
+        # 计算置信度 (位置估计的方差相对容差越小越可信, 测量与模型不符时降低)
+        pos_var = (self._kf_cov[0, 0, 0] + self._kf_cov[1, 0, 0]) * max(1.0, self._nis / 4)
+        confidence = 1.0 / (1.0 + pos_var / self.CONFIDENCE_TOLERANCE ** 2)
         
         # 计算风险等级
-        risk = self._calculate_risk(current_state, predicted_states)
+        risk = self._calculate_risk(current_state, states[:, TRAJ_OBSTACLE])
         
         return Prediction(
             timestamp=current_state.timestamp,
             horizon=horizon,
-            predicted_states=predicted_states,
+            predicted_states=StateTrajectory(current_state, states),
             confidence=confidence,
-            risk_level=risk
+            risk_level=risk,
+            state_array=states
         )
     
-    def _calculate_risk(self, current: EnvironmentState, predicted: List[EnvironmentState]) -> float:
+    def _calculate_risk(self, current: EnvironmentState, predicted_obstacle: np.ndarray) -> float:
         """计算风险等级"""
-        risk = 0.0
-        
-        # 障碍物风险
-        if current.obstacle_distance < 0.5:
-            risk += 0.5
-        elif current.obstacle_distance < 1.0:
-            risk += 0.3
-        
-        # 预测碰撞风险
-        for state in predicted:
-            if state.obstacle_distance < 0.3:
-                risk += 0.2
-                break
-        
-        # 电池风险
-        if current.battery_level < 20:
-            risk += 0.2
-        elif current.battery_level < 50:
-            risk += 0.1
-        
-        # 目标距离风险
-        dist_to_target = np.sqrt(
-            (current.position[0] - current.target[0])**2 +
-            (current.position[1] - current.target[1])**2
-        )
-        if dist_to_target > 10:
-            risk += 0.1
-        
-        return min(1.0, risk)
+        dist_to_target = math.hypot(current.position[0] - current.target[0],
+                                    current.position[1] - current.target[1])
+        return _risk_score(float(current.obstacle_distance), float(current.battery_level),
+                           dist_to_target, predicted_obstacle)
 
 
 class ReactionSystem:
     """反应系统 - 根据预测结果生成反应"""
     
-    def __init__(self):
-        self.reaction_rules = [
-            # (条件, 反应类型, 优先级)
-            (lambda p: p.has_collision_risk, ReactionType.AVOID, 10),
-            (lambda p: p.predicted_states[-1].obstacle_distance < 0.5, ReactionType.AVOID, 9),
-            (lambda p: p.risk_level > 0.8, ReactionType.STOP, 8),
-            (lambda p: p.risk_level > 0.5 and p.predicted_states[-1].battery_level < 30, ReactionType.RETURN, 7),
-            (lambda p: p.has_goal_reached, ReactionType.RETURN, 5),
-            (lambda p: p.confidence < 0.3, ReactionType.EXPLORE, 3),
-        ]
+    # 反应规则 (反应类型, 优先级), 按优先级从高到低; 条件见 _match_rule
+    RULES = (
+        (ReactionType.AVOID, 10),    # 碰撞风险
+        (ReactionType.AVOID, 9),     # 预测终点障碍物距离 < 0.5m
+        (ReactionType.STOP, 8),      # 风险 > 0.8
+        (ReactionType.RETURN, 7),    # 风险 > 0.5 且预测终点电量 < 30
+        (ReactionType.RETURN, 5),    # 预计到达目标
+        (ReactionType.EXPLORE, 3),   # 置信度 < 0.5 (位置不确定度超过容差)
+    )
     
     def react(self, prediction: Prediction, current_state: EnvironmentState) -> Reaction:
         """根据预测结果生成反应"""
         
         # 检查规则
-        for condition, reaction_type, priority in self.reaction_rules:
-            if condition(prediction):
-                return self._create_reaction(reaction_type, prediction, current_state, priority)
+        rule = self._match_rule(prediction)
+        if rule >= 0:
+            reaction_type, priority = self.RULES[rule]
+            return self._create_reaction(reaction_type, prediction, current_state, priority)
         
         # 默认: 靠近目标
         return self._create_reaction(ReactionType.APPROACH, prediction, current_state, 1)
     
+    @staticmethod
+    def _match_rule(prediction: Prediction) -> int:
+        """
+        按优先级检查 RULES, 返回第一条满足条件的规则下标, 都不满足时返回 -1
+        
+        各字段只读取一次; 预测终点的障碍物距离和电量直接从轨迹数组读取。
+        """
+        risk = prediction.risk_level
+        if risk > 0.7:
+            return 0
+        
+        if prediction.state_array is not None:
+            final = prediction.state_array[-1]
+            obs_dist, battery = final[TRAJ_OBSTACLE], final[TRAJ_BATTERY]
+        else:
+            final = prediction.predicted_states[-1]
+            obs_dist, battery = final.obstacle_distance, final.battery_level
+        
+        if obs_dist < 0.5:
+            return 1
+        if risk > 0.8:
+            return 2
+        if risk > 0.5 and battery < 30:
+            return 3
+        if prediction.has_goal_reached:
+            return 4
+        if prediction.confidence < 0.5:
+            return 5
+        return -1
+    
     def _create_reaction(self, reaction_type: ReactionType, prediction: Prediction, 
                         state: EnvironmentState, priority: int) -> Reaction:
         """创建反应动作"""
@@ -243,8 +404,8 @@ class ReactionSystem:
         if reaction_type == ReactionType.AVOID:
             # 远离障碍物
             avoid_dir = (state.obstacle_direction + 180) % 360
-            rad = np.radians(avoid_dir)
-            action = (np.cos(rad), np.sin(rad))
+            rad = math.radians(avoid_dir)
+            action = (math.cos(rad), math.sin(rad))
             reason = f"避障: 障碍物距离 {state.obstacle_distance:.2f}m"
             
         elif reaction_type == ReactionType.STOP:
@@ -255,7 +416,7 @@ class ReactionSystem:
             # 靠近目标
             dx = state.target[0] - state.position[0]
             dy = state.target[1] - state.position[1]
-            dist = np.sqrt(dx**2 + dy**2)
+            dist = math.hypot(dx, dy)
             if dist > 0:
                 action = (dx/dist, dy/dist)
             else:
@@ -264,9 +425,8 @@ class ReactionSystem:
             
         elif reaction_type == ReactionType.EXPLORE:
             # 探索: 随机方向
-            angle = np.random.uniform(0, 360)
-            rad = np.radians(angle)
-            action = (np.cos(rad), np.sin(rad))
+            rad = random.uniform(0, 2 * math.pi)
+            action = (math.cos(rad), math.sin(rad))
             reason = "不确定环境，探索中"
             
         elif reaction_type == ReactionType.RETURN: